@@ -26,6 +26,9 @@ export default function AmmaChat() {
   const messagesEndRef = useRef<HTMLDivElement>(null)
   const wsRef = useRef<WebSocket | null>(null)
   const streamingMessageRef = useRef("")
+  // Offset and log epoch of the last frame received; a reconnect resumes after it
+  const lastOffsetRef = useRef(0)
+  const epochRef = useRef("")
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: "smooth" })
@@ -44,7 +47,9 @@ export default function AmmaChat() {
                      (typeof window !== 'undefined' && window.location.hostname.includes('github.io') 
                       ? 'wss://alluring-tenderness-staging.up.railway.app/ws' 
                       : 'ws://localhost:8001/ws')
-        const ws = new WebSocket(`${wsUrl}/${sessionId}`)
+        const ws = new WebSocket(
+          `${wsUrl}/${sessionId}?after=${lastOffsetRef.current}&epoch=${epochRef.current}`
+        )
         wsRef.current = ws
 
         ws.onopen = () => {
@@ -55,6 +60,17 @@ export default function AmmaChat() {
 
         ws.onmessage = (event) => {
           const data = JSON.parse(event.data)
+
+          // Frames are numbered per session; skip any already seen
+          if (typeof data.offset === 'number') {
+            if (data.epoch !== epochRef.current) {
+              // The session's log expired and restarted; its offsets count from 1 again
+              epochRef.current = data.epoch
+              lastOffsetRef.current = 0
+            }
+            if (data.offset <= lastOffsetRef.current) return
+            lastOffsetRef.current = data.offset
+          }
           
           if (data.type === 'response') {
             // Handle regular non-streaming response (fallback)
@@ -74,9 +90,16 @@ export default function AmmaChat() {
             setIsStreaming(true)
             setIsTyping(false)
           } else if (data.type === 'stream_chunk') {
-            // Add character to current streaming message
+            // Append chunk (a word, sentence or batch of tokens) to the current streaming message
+            if (!data.content) return
             streamingMessageRef.current += data.content
             setCurrentStreamingMessage(streamingMessageRef.current)
+            // A resumed stream continues where it left off
+            setIsStreaming(true)
+          } else if (data.type === 'stream_reset') {
+            // Server discarded what was streamed so far (e.g. a rejected draft)
+            streamingMessageRef.current = ""
+            setCurrentStreamingMessage("")
           } else if (data.type === 'stream_end') {
             // End streaming - add final message to messages array
             const finalMessage: Message = {
@@ -89,8 +112,28 @@ export default function AmmaChat() {
             streamingMessageRef.current = ""
             setCurrentStreamingMessage("")
             setIsStreaming(false)
+          } else if (data.type === 'story_correction') {
+            // The story shown early was revised after evaluation - swap it in place
+            setMessages((prev) => {
+              const index = prev.map((m) => m.sender).lastIndexOf("amma")
+              if (index === -1) return prev
+              const updated = [...prev]
+              updated[index] = { ...updated[index], text: data.content }
+              return updated
+            })
           } else if (data.type === 'typing') {
             setIsTyping(true)
+          } else if (data.type === 'busy') {
+            // Server is saturated - the message was not processed
+            const busyResponse: Message = {
+              id: Date.now().toString(),
+              text: `So many little ones want stories right now, sweetheart. Please ask me again in ${data.retry_after ?? 5} seconds.`,
+              sender: "amma",
+              timestamp: new Date(),
+            }
+            setMessages((prev) => [...prev, busyResponse])
+            setIsTyping(false)
+            setIsStreaming(false)
           } else if (data.type === 'error') {
             console.error('❌ AMMA Error:', data.content)
             const errorResponse: Message = {
@@ -106,6 +149,7 @@ export default function AmmaChat() {
         }
 
         ws.onclose = () => {
+          // The server keeps the turn running; missed frames are replayed on reconnect
           console.log('🔌 Disconnected from AMMA - reconnecting...')
           setIsConnected(false)
           setIsStreaming(false)
@@ -2,40 +2,144 @@
 
 import asyncio
 import json
+import logging
+import os
+import re
+import time
 import uuid
-from typing import Dict, Optional
+import weakref
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
-from pydantic import BaseModel
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from pydantic import BaseModel, field_validator
 
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.amma.budget import parse_budget
+from src.amma.checkpoint import open_checkpointer, prune_thread, thread_config
+from src.amma.cluster import InProcessBroker, create_broker
 from src.amma.context import Context
-from src.amma.graph import graph
-from src.amma.state import State
+from src.amma.fast_path import fast_path_stats
+from src.amma.graph import compile_graph
+from src.amma.greetings import GREETING_TRIGGER, GreetingPool
+from src.amma.history import compaction_stats
+from src.amma.jobs import (
+    JOB_BUSY,
+    JOB_DONE,
+    JOB_FAILED,
+    InMemoryEventLog,
+    create_event_log,
+    new_job,
+)
+from src.amma.metrics import (
+    DEADLINE_MISSES,
+    TURN_ERRORS,
+    TURN_LATENCY,
+    TYPING_LATENCY,
+    increment,
+    observe,
+    register_stats,
+    render_metrics,
+)
+from src.amma.resilience import model_health
+from src.amma.sessions import (
+    InMemorySessionStore,
+    SessionStore,
+    create_session_store,
+    estimate_state_size,
+    new_session,
+)
+from src.amma.singleflight import story_flights
+from src.amma.story_cache import story_cache
+from src.amma.utils import model_cache_stats
 
 
 # Pydantic models for API
 class ChatMessage(BaseModel):
     message: str
     session_id: Optional[str] = None
+    # Return at once with a job id; progress is read from the session's events
+    background: bool = False
+    # Latency budget for this turn, overriding TURN_BUDGET_SECONDS
+    budget_seconds: Optional[float] = None
+
+    @field_validator("budget_seconds", mode="before")
+    @classmethod
+    def check_budget(cls, value: Any) -> Optional[float]:
+        """Reject non-positive budgets and clamp large ones to MAX_TURN_BUDGET."""
+        return parse_budget(value, MAX_TURN_BUDGET)
 
 
 class ChatResponse(BaseModel):
     response: str
     session_id: str
     status: str = "success"
+    job_id: Optional[str] = None
+
+
+# Graph with per-session threads. Replaced on startup by the checkpointer
+# configured through AMMA_CHECKPOINTER (memory or sqlite).
+agent = compile_graph(InMemorySaver())
+
+
+def check_shared_state():
+    """Refuse to start several workers on per-process state.
+
+    Raises RuntimeError if AMMA_WORKERS > 1 while sessions, checkpoints or the
+    broker live in process memory, where other workers cannot see them.
+    """
+    if WORKERS <= 1:
+        return
+    local = []
+    if isinstance(sessions, InMemorySessionStore):
+        local.append("AMMA_SESSION_STORE=sqlite")
+    if os.getenv("AMMA_CHECKPOINTER", "memory").lower() == "memory":
+        local.append("AMMA_CHECKPOINTER=sqlite")
+    if isinstance(broker, InProcessBroker):
+        local.append("AMMA_BROKER=sqlite")
+    if isinstance(events, InMemoryEventLog):
+        local.append("AMMA_EVENT_LOG=sqlite")
+    if local:
+        raise RuntimeError(
+            f"AMMA_WORKERS={WORKERS} needs shared state; set " + ", ".join(local)
+        )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the configured checkpointer for the lifetime of the server."""
+    global agent
+    check_shared_state()
+    async with open_checkpointer() as checkpointer:
+        agent = compile_graph(checkpointer)
+        greeting_task = asyncio.create_task(greeting_pool.run()) if greeting_pool.size > 0 else None
+        broker_task = asyncio.create_task(broker.run(manager.deliver))
+        yield
+        broker_task.cancel()
+        broker.close()
+        if greeting_task is not None:
+            greeting_task.cancel()
+        # Let pending thread deletions finish before the connection closes
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
 
 
 # FastAPI app
 app = FastAPI(
     title="AMMA - Bedtime Story Agent",
     description="A conversational AI that creates personalized bedtime stories for children",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -47,38 +151,282 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory storage for sessions (in production, use Redis or similar)
-sessions: Dict[str, Dict] = {}
+# Keep references to fire-and-forget tasks so they are not garbage collected
+_background_tasks: set = set()
+
+
+async def forget_session(session_id: str):
+    """Delete a session's buffered frames and persisted thread."""
+    await events.drop(session_id)
+    await agent.checkpointer.adelete_thread(session_id)
+
+
+def drop_thread(session_id: str):
+    """Delete a session's persisted thread and buffered frames in the background."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(forget_session(session_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+# Session storage: in-memory LRU+TTL by default, SQLite with AMMA_SESSION_STORE=sqlite.
+# Evicted sessions also drop their checkpointed conversation.
+sessions: SessionStore = create_session_store(on_evict=drop_thread)
+
+# Worker processes serving this app (uvicorn --workers). More than one needs
+# the SQLite session store, checkpointer and broker so any worker can serve
+# any session.
+WORKERS = int(os.getenv("AMMA_WORKERS", "1"))
+
+# Delivers frames to sockets held by other workers and orders a session's
+# turns across workers. In process by default; AMMA_BROKER=sqlite to share.
+broker = create_broker()
+
+# Every frame sent to a session, numbered per session, so a client that
+# reconnects with ``?after=<offset>&epoch=<epoch>`` gets what it missed replayed
+events = create_event_log()
+
+# Run turns as background jobs that outlive the WebSocket that started them.
+# When disabled the socket handler awaits each turn itself.
+BACKGROUND_JOBS = os.getenv("AMMA_BACKGROUND_JOBS", "true").lower() == "true"
+
+# Forward real model tokens over the WebSocket instead of replaying the final
+# text with a fake typing effect.
+TOKEN_STREAMING = os.getenv("AMMA_TOKEN_STREAMING", "true").lower() == "true"
+
+# Whether story drafts are streamed while they are still being evaluated. If a
+# draft is rejected the client receives a ``stream_reset`` frame and the revised
+# draft streams in its place. When disabled only the approved story is sent.
+STREAM_DRAFTS = os.getenv("AMMA_STREAM_DRAFTS", "false").lower() == "true"
+
+# Pacing for complete responses: frames are sent per word or per sentence (or
+# as one frame with "none"), sleeping STREAM_DELAY seconds between them. A
+# delay of 0 sends everything immediately.
+STREAM_CHUNKING = os.getenv("AMMA_STREAM_CHUNKING", "word")
+STREAM_DELAY = float(os.getenv("AMMA_STREAM_DELAY", "0.05"))
+
+# Token deltas are coalesced into one frame per time window (seconds). 0 sends
+# every delta as its own frame.
+STREAM_FLUSH_INTERVAL = float(os.getenv("AMMA_STREAM_FLUSH_INTERVAL", "0.05"))
+
+_WORD_RE = re.compile(r"\S+\s*|\s+")
+_SENTENCE_RE = re.compile(r"[^.!?]*(?:[.!?]+|$)\s*")
+
+# Cap on graph runs in flight across all sessions, and how long a turn may wait
+# for a free slot before the server reports itself busy.
+MAX_CONCURRENT_RUNS = int(os.getenv("AMMA_MAX_CONCURRENT_RUNS", "32"))
+RUN_QUEUE_TIMEOUT = float(os.getenv("AMMA_RUN_QUEUE_TIMEOUT", "10"))
+BUSY_RETRY_AFTER = 5  # Seconds suggested to clients that were turned away
+
+# Largest latency budget a request may ask for; larger ones are clamped
+MAX_TURN_BUDGET = float(os.getenv("AMMA_MAX_TURN_BUDGET", "300"))
+
+# Shown to the child when a turn fails; the error itself is only logged, as it
+# can name models and carry provider messages
+ERROR_MESSAGE = "I'm sorry, dear one. Something went wrong. Please try again."
+
+run_slots = asyncio.Semaphore(MAX_CONCURRENT_RUNS)
+
+# One lock per session serializes its turns; entries vanish once unused
+session_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+# Ready-made greetings for new sessions, refreshed in the background.
+# AMMA_GREETING_POOL_SIZE=0 greets every session with a live model call instead.
+greeting_pool = GreetingPool(
+    size=int(os.getenv("AMMA_GREETING_POOL_SIZE", "5")),
+    refresh_interval=float(os.getenv("AMMA_GREETING_REFRESH_INTERVAL", str(15 * 60))),
+)
+
+turn_stats = {"in_flight": 0, "completed": 0, "failed": 0, "rejected": 0}
+job_stats = {"running": 0, JOB_DONE: 0, JOB_FAILED: 0, JOB_BUSY: 0}
+
+# Existing counters, exported as gauges on /metrics
+register_stats("amma_model_cache", model_cache_stats)
+register_stats("amma_sessions", sessions.stats)
+register_stats("amma_turns", lambda: turn_stats)
+register_stats("amma_history", lambda: compaction_stats)
+register_stats("amma_fast_path", lambda: fast_path_stats)
+register_stats("amma_greetings", greeting_pool.stats)
+register_stats("amma_broker", broker.stats)
+register_stats("amma_events", events.stats)
+register_stats("amma_jobs", lambda: job_stats)
+register_stats("amma_single_flight", story_flights.stats)
+register_stats("amma_model_health", model_health.stats)
+if story_cache is not None:
+    register_stats("amma_story_cache", story_cache.stats)
+
+
+class ServerBusyError(Exception):
+    """Raised when no graph run slot frees up within RUN_QUEUE_TIMEOUT."""
+
+
+def session_lock(session_id: str) -> asyncio.Lock:
+    """Return the lock that serializes a session's turns in this worker."""
+    lock = session_locks.get(session_id)
+    if lock is None:
+        lock = session_locks[session_id] = asyncio.Lock()
+    return lock
+
+
+@asynccontextmanager
+async def hold_session(session_id: str):
+    """Hold a session exclusively, in this worker and then across workers.
+
+    The local lock queues a worker's own turns without touching the broker,
+    so only one of them at a time waits for the cross-worker lease.
+    """
+    async with session_lock(session_id), broker.lease(session_id):
+        yield
+
+
+@asynccontextmanager
+async def turn_slot(session_id: str):
+    """Serialize turns within a session and bound concurrent graph runs.
+
+    A turn first waits for earlier turns of the same session, then for a
+    global run slot. Raises ServerBusyError if the server stays saturated.
+    """
+    async with hold_session(session_id):
+        try:
+            await asyncio.wait_for(run_slots.acquire(), RUN_QUEUE_TIMEOUT)
+        except TimeoutError:
+            turn_stats["rejected"] += 1
+            raise ServerBusyError("AMMA is busy, please try again shortly") from None
+        turn_stats["in_flight"] += 1
+        try:
+            yield
+        except BaseException:
+            # Errors and cancelled turns alike
+            turn_stats["failed"] += 1
+            raise
+        else:
+            turn_stats["completed"] += 1
+        finally:
+            turn_stats["in_flight"] -= 1
+            run_slots.release()
 
 
 class ConnectionManager:
-    """Manages WebSocket connections for streaming."""
+    """Manages WebSocket connections for streaming.
+
+    Every frame is appended to the session's event log first, so a frame
+    that cannot be delivered is replayed when the client reconnects. Sockets
+    connected to this worker are written directly; frames for a session whose
+    socket is held by another worker go through the broker.
+    """
     
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
+        # Frames held back from sockets still catching up on missed frames
+        self.pending: Dict[str, List[dict]] = {}
     
-    async def connect(self, websocket: WebSocket, session_id: str):
+    async def connect(
+        self,
+        websocket: WebSocket,
+        session_id: str,
+        after: Optional[int] = None,
+        epoch: Optional[str] = None,
+    ):
+        """Accept a socket, replaying frames after offset ``after`` of ``epoch`` first.
+
+        The socket is registered before the last replay read: a frame another
+        worker logs in between is then either in that read or delivered here.
+        Frames delivered meanwhile are held back and sent after the replay,
+        skipping offsets it already sent.
+        """
         await websocket.accept()
-        self.active_connections[session_id] = websocket
+        if after is None:
+            self.active_connections[session_id] = websocket
+            await broker.register(session_id)
+            return
+        while missed := await events.read(session_id, after, epoch):
+            for frame in missed:
+                await websocket.send_text(json.dumps(frame))
+            after, epoch = missed[-1]["offset"], missed[-1]["epoch"]
+
+        held = self.pending[session_id] = []
+        try:
+            await broker.register(session_id)
+            frames = await events.read(session_id, after, epoch)
+            while frames or held:
+                frame = frames.pop(0) if frames else held.pop(0)
+                if "offset" in frame:
+                    if frame["epoch"] == epoch and frame["offset"] <= after:
+                        continue
+                    after, epoch = frame["offset"], frame["epoch"]
+                await websocket.send_text(json.dumps(frame))
+            # No await between the last check and going live
+            self.active_connections[session_id] = websocket
+        except Exception:
+            if session_id not in self.active_connections:
+                await broker.unregister(session_id)
+            raise
+        finally:
+            if self.pending.get(session_id) is held:
+                del self.pending[session_id]
     
-    def disconnect(self, session_id: str):
-        if session_id in self.active_connections:
+    async def disconnect(self, session_id: str, websocket: WebSocket):
+        """Forget a closed socket, unless a reconnect has already replaced it."""
+        if self.active_connections.get(session_id) is websocket:
             del self.active_connections[session_id]
+            # A reconnect still catching up keeps the registration
+            if session_id not in self.pending:
+                await broker.unregister(session_id)
     
-    async def send_message(self, session_id: str, message: dict):
-        if session_id in self.active_connections:
+    async def deliver(self, session_id: str, message: dict):
+        """Write a frame to a socket connected to this worker."""
+        if session_id in self.pending:
+            self.pending[session_id].append(message)
+        elif session_id in self.active_connections:
             websocket = self.active_connections[session_id]
             try:
                 await websocket.send_text(json.dumps(message))
             except Exception:
-                self.disconnect(session_id)
+                await self.disconnect(session_id, websocket)
+
+    async def send_message(self, session_id: str, message: dict, log: bool = True):
+        """Send a frame to the session's socket, buffering it for replay if ``log``.
+
+        Unlogged frames carry no offset and are never replayed on reconnect.
+        """
+        if log:
+            message = await events.append(session_id, message)
+        if session_id in self.active_connections or session_id in self.pending:
+            await self.deliver(session_id, message)
+        else:
+            await broker.publish(session_id, message)
 
 
 manager = ConnectionManager()
 
 
-async def stream_response(session_id: str, response: str, base_delay: float = 0.03):
-    """Stream response character by character to create typing effect."""
+def split_stream_chunks(text: str, chunking: str = "word") -> List[str]:
+    """Split text into the chunks sent as individual ``stream_chunk`` frames.
+
+    Args:
+        text: The full response text.
+        chunking: ``word``, ``sentence`` or ``none`` (a single frame).
+    """
+    if chunking == "word":
+        return _WORD_RE.findall(text)
+    if chunking == "sentence":
+        return [chunk for chunk in _SENTENCE_RE.findall(text) if chunk]
+    return [text] if text else []
+
+
+async def stream_response(
+    session_id: str,
+    response: str,
+    base_delay: Optional[float] = None,
+    chunking: Optional[str] = None,
+):
+    """Stream a complete response in word/sentence chunks to create a typing effect."""
+    base_delay = STREAM_DELAY if base_delay is None else base_delay
+    chunking = chunking or STREAM_CHUNKING
+    start = time.perf_counter()
     try:
         # Send start streaming signal
         await manager.send_message(session_id, {
@@ -86,24 +434,26 @@ async def stream_response(session_id: str, response: str, base_delay: float = 0.
             "content": ""
         })
         
-        # Stream each character with variable delay for natural feel
-        for i, char in enumerate(response):
+        for chunk in split_stream_chunks(response, chunking):
             await manager.send_message(session_id, {
                 "type": "stream_chunk",
-                "content": char
+                "content": chunk
             })
             
-            # Variable delay: longer after punctuation, shorter for regular chars
-            if char in '.!?':
-                delay = base_delay * 8  # Longer pause after sentences
-            elif char in ',;:':
-                delay = base_delay * 4  # Medium pause after clauses
-            elif char == ' ':
-                delay = base_delay * 1.5  # Slightly longer for spaces
+            if base_delay <= 0:
+                continue
+
+            # Variable delay: longer after sentences and clauses
+            tail = chunk.rstrip()[-1:]
+            if tail in ('.', '!', '?'):
+                delay = base_delay * 4  # Longer pause after sentences
+            elif tail in (',', ';', ':'):
+                delay = base_delay * 2  # Medium pause after clauses
             else:
-                delay = base_delay  # Normal speed for regular characters
+                delay = base_delay
             
             await asyncio.sleep(delay)
+        observe(TYPING_LATENCY, time.perf_counter() - start)
         
         # Send end streaming signal
         await manager.send_message(session_id, {
@@ -119,45 +469,305 @@ async def stream_response(session_id: str, response: str, base_delay: float = 0.
         })
 
 
-async def run_amma_agent(message: str, session_id: str) -> str:
-    """Run the AMMA agent and return the response."""
+def get_session(session_id: str) -> Dict[str, Any]:
+    """Get or create the session data for a session id."""
+    session_data = sessions.get(session_id)
+    if session_data is None:
+        session_data = new_session()
+        sessions.put(session_id, session_data)
+    return session_data
+
+
+async def finish_turn(
+    session_id: str, session_data: Dict[str, Any], values: Optional[Dict[str, Any]]
+):
+    """Record a completed turn so the store can account for the session's size.
+
+    Older checkpoints of the thread are dropped, so the state size is what the
+    checkpointer actually holds.
+    """
+    await prune_thread(agent.checkpointer, session_id)
+    session_data["turns"] += 1
+    if values is not None:
+        session_data["state_size"] = estimate_state_size(values)
+    sessions.put(session_id, session_data)
+
+
+def turn_context(session_data: Dict[str, Any], budget_seconds: Optional[float]) -> Context:
+    """Return the session's context for one turn, with the request's budget if it set one."""
+    context = session_data["context"]
+    if budget_seconds is None:
+        return context
+    return replace(context, turn_budget_seconds=budget_seconds)
+
+
+def record_turn_latency(mode: str, elapsed: float, budget_seconds: float):
+    """Observe a turn's run time and count it if it overran its budget."""
+    observe(TURN_LATENCY, elapsed, mode=mode)
+    if 0 < budget_seconds < elapsed:
+        increment(DEADLINE_MISSES, mode=mode)
+
+
+def _chunk_text(chunk: AIMessageChunk) -> str:
+    """Extract the text delta from a streamed message chunk."""
+    if isinstance(chunk.content, str):
+        return chunk.content
+    return "".join(
+        block.get("text", "") for block in chunk.content
+        if isinstance(block, dict) and block.get("type") == "text"
+    )
+
+
+async def stream_amma_agent(
+    message: str, session_id: str, budget_seconds: Optional[float] = None
+) -> AsyncIterator[Dict[str, str]]:
+    """Run the AMMA agent and yield WebSocket frames as model tokens arrive.
+
+    Tokens from ``amma`` are forwarded as they are generated. Story drafts from
+    ``story_creator`` are forwarded only when ``STREAM_DRAFTS`` is enabled;
+    otherwise the story is sent once ``story_presenter`` has approved it.
+
+    A story presented before its evaluation (``optimistic_presentation``)
+    ends the message at once with ``stream_end``; if the editor then rejects
+    it, the revised story follows as a ``story_correction`` frame.
+
+    When a model call fails part-way and is retried on the fallback model,
+    ``stream_reset`` discards the failed call's tokens before the retry's.
+    """
+    session_data = get_session(session_id)
+    context = turn_context(session_data, budget_seconds)
+
+    # Parallel drafts would interleave on screen, so only single drafts stream
+    stream_drafts = STREAM_DRAFTS and context.story_drafts <= 1
+    streamed_node: Optional[str] = None  # Node whose output is on screen
+    # (node task, model attempt) whose tokens are on screen
+    streamed_call: Optional[Tuple[str, int]] = None
+    presented = False  # A provisional story was shown and its message ended
+    final_values: Optional[Dict[str, Any]] = None
+
+    # Token deltas are buffered and flushed once per STREAM_FLUSH_INTERVAL, and
+    # at every node boundary so nothing lingers while the next node runs.
+    loop = asyncio.get_running_loop()
+    pending: List[str] = []
+    last_flush = loop.time()
+
+    def flush() -> Optional[Dict[str, str]]:
+        nonlocal last_flush
+        last_flush = loop.time()
+        if not pending:
+            return None
+        frame = {"type": "stream_chunk", "content": "".join(pending)}
+        pending.clear()
+        return frame
+
+    # The checkpointer holds the conversation, so only the new message is sent
+    async for mode, payload in agent.astream(
+        {"messages": [HumanMessage(content=message)]},
+        thread_config(session_id),
+        context=context,
+        stream_mode=["messages", "updates", "values"],
+    ):
+        if mode == "messages":
+            chunk, metadata = payload
+            node = metadata.get("langgraph_node")
+            if not isinstance(chunk, AIMessageChunk):
+                continue
+            if node == "amma" or (node == "story_creator" and stream_drafts):
+                text = _chunk_text(chunk)
+                if not text:
+                    continue
+                call = (metadata.get("langgraph_checkpoint_ns", ""), metadata.get("model_attempt", 0))
+                if streamed_node not in (None, node):
+                    # The story replaces amma's chatter, as in the non-streaming path
+                    pending.clear()
+                    yield {"type": "stream_reset", "content": ""}
+                elif streamed_call and streamed_call[0] == call[0] and streamed_call != call:
+                    # The call failed part-way; the fallback model's reply replaces it
+                    pending.clear()
+                    yield {"type": "stream_reset", "content": ""}
+                streamed_node = node
+                streamed_call = call
+                pending.append(text)
+                if loop.time() - last_flush >= STREAM_FLUSH_INTERVAL:
+                    if frame := flush():
+                        yield frame
+
+        elif mode == "updates":
+            if frame := flush():
+                yield frame
+            for message in (payload.get("fast_path") or {}).get("messages", []):
+                # Replies decided locally never pass through a model stream
+                if isinstance(message, AIMessage) and not message.tool_calls and message.content:
+                    streamed_node = "fast_path"
+                    yield {"type": "stream_chunk", "content": message.content}
+            if "revision_handler" in payload and streamed_node == "story_creator":
+                # The streamed draft was rejected - discard it client-side
+                streamed_node = None
+                yield {"type": "stream_reset", "content": ""}
+            if "story_presenter" in payload:
+                update = payload["story_presenter"] or {}
+                story = next(
+                    (m.content for m in update.get("messages", []) if isinstance(m, AIMessage)),
+                    None,
+                )
+                if presented:
+                    # The provisional story was rejected; the revision replaces it
+                    if story is not None:
+                        yield {"type": "story_correction", "content": story}
+                elif story is not None and streamed_node != "story_creator":
+                    # Sent whole unless the approved draft is already on screen
+                    # (cached stories never pass through story_creator)
+                    if streamed_node is not None:
+                        yield {"type": "stream_reset", "content": ""}
+                    streamed_node = "story_presenter"
+                    yield {"type": "stream_chunk", "content": story}
+                if update.get("provisional_message_id"):
+                    # Evaluation continues in the background; the child can read on
+                    presented = True
+                    stream_drafts = False
+                    streamed_node = None
+                    yield {"type": "stream_end", "content": ""}
+
+        else:
+            final_values = payload
+
+    if frame := flush():
+        yield frame
+
+    await finish_turn(session_id, session_data, final_values)
+
+
+async def stream_agent_response(
+    session_id: str, message: str, budget_seconds: Optional[float] = None
+):
+    """Stream a full agent turn to the session's WebSocket."""
+    budget = turn_context(get_session(session_id), budget_seconds).turn_budget_seconds
+    async with turn_slot(session_id):
+        await manager.send_message(session_id, {
+            "type": "stream_start",
+            "content": ""
+        })
+
+        start = time.perf_counter()
+        ended = False  # An optimistically presented story ends the message early
+        try:
+            async for frame in stream_amma_agent(message, session_id, budget_seconds):
+                await manager.send_message(session_id, frame)
+                ended = ended or frame["type"] == "stream_end"
+        except Exception:
+            increment(TURN_ERRORS, mode="stream")
+            raise
+        finally:
+            record_turn_latency("stream", time.perf_counter() - start, budget)
+
+        if not ended:
+            await manager.send_message(session_id, {
+                "type": "stream_end",
+                "content": ""
+            })
+
+
+async def run_amma_agent(
+    message: str, session_id: str, budget_seconds: Optional[float] = None
+) -> str:
+    """Run the AMMA agent and return the response.
+
+    Raises ServerBusyError if no run slot frees up in time.
+    """
     try:
-        # Get or create session state
-        if session_id not in sessions:
-            sessions[session_id] = {
-                "state": State(messages=[]),
-                "context": Context()
-            }
-        
-        session_data = sessions[session_id]
-        current_state = session_data["state"]
-        context = session_data["context"]
-        
-        # Add user message to state
-        from langchain_core.messages import HumanMessage
-        user_message = HumanMessage(content=message)
-        current_state.messages.append(user_message)
-        
-        # Run the agent
-        result = await graph.ainvoke(
-            current_state.model_dump(),
-            config={"configurable": {"context": context}}
-        )
-        
-        # Update session state
-        updated_state = State(**result)
-        sessions[session_id]["state"] = updated_state
-        
-        # Get the last AI message
-        if updated_state.messages:
-            last_message = updated_state.messages[-1]
-            if hasattr(last_message, 'content'):
-                return last_message.content
-        
-        return "I'm sorry, I couldn't generate a response. Please try again."
-        
-    except Exception as e:
-        return f"I encountered an error: {str(e)}. Please try again."
+        async with turn_slot(session_id):
+            start = time.perf_counter()
+            budget = 0.0
+            try:
+                session_data = get_session(session_id)
+                context = turn_context(session_data, budget_seconds)
+                budget = context.turn_budget_seconds
+
+                # Run the agent; the checkpointer appends the message to the thread
+                result = await agent.ainvoke(
+                    {"messages": [HumanMessage(content=message)]},
+                    thread_config(session_id),
+                    context=context
+                )
+                await finish_turn(session_id, session_data, result)
+            finally:
+                record_turn_latency("invoke", time.perf_counter() - start, budget)
+    except ServerBusyError:
+        raise
+    except Exception:
+        # Outside the run slot, so the slot counts the turn as failed
+        increment(TURN_ERRORS, mode="invoke")
+        logger.exception("Turn failed for session %s", session_id)
+        return ERROR_MESSAGE
+
+    # Get the last AI message
+    messages = result.get("messages", [])
+    if messages:
+        last_message = messages[-1]
+        if hasattr(last_message, 'content'):
+            return last_message.content
+
+    return "I'm sorry, I couldn't generate a response. Please try again."
+
+
+async def run_turn(session_id: str, message: str, budget_seconds: Optional[float] = None):
+    """Run one turn and send its frames to the session's WebSocket.
+
+    Raises ServerBusyError if no run slot frees up in time.
+    """
+    if TOKEN_STREAMING:
+        # Forward model tokens as they are generated
+        await stream_agent_response(session_id, message, budget_seconds)
+    else:
+        # Replay the finished reply with a typing effect
+        response = await run_amma_agent(message, session_id, budget_seconds)
+        await stream_response(session_id, response)
+
+
+async def run_job(job: Dict[str, Any], message: str, budget_seconds: Optional[float] = None):
+    """Run a turn as a job, recording its outcome and bracketing its frames."""
+    session_id = job["session_id"]
+    job_stats["running"] += 1
+    try:
+        await run_turn(session_id, message, budget_seconds)
+        job["status"] = JOB_DONE
+    except ServerBusyError as e:
+        job["status"] = JOB_BUSY
+        await send_busy(session_id, str(e))
+    except Exception:
+        job["status"] = JOB_FAILED
+        logger.exception("Job %s failed", job["job_id"])
+        await manager.send_message(session_id, {
+            "type": "error",
+            "content": ERROR_MESSAGE
+        })
+    finally:
+        job_stats["running"] -= 1
+        job_stats[job["status"]] += 1
+        job["finished_at"] = time.time()
+        await events.put_job(job)
+        await manager.send_message(session_id, {
+            "type": "job_end",
+            "job_id": job["job_id"],
+            "status": job["status"]
+        })
+
+
+async def start_job(
+    session_id: str, message: str, budget_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """Start a turn in the background and return its job record.
+
+    The job does not depend on the caller or on any socket: its frames go to
+    the session's event log and to whichever socket is connected.
+    """
+    job = new_job(session_id)
+    await events.put_job(job)
+    await manager.send_message(session_id, {"type": "job_start", "job_id": job["job_id"]})
+    task = asyncio.create_task(run_job(job, message, budget_seconds))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return job
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -199,47 +809,117 @@ async def get_chat_interface():
 async def chat_endpoint(chat_message: ChatMessage):
     """Handle chat messages via REST API."""
     session_id = chat_message.session_id or str(uuid.uuid4())
+
+    if chat_message.background:
+        job = await start_job(session_id, chat_message.message, chat_message.budget_seconds)
+        return ChatResponse(
+            response="",
+            session_id=session_id,
+            status="accepted",
+            job_id=job["job_id"]
+        )
     
     try:
-        response = await run_amma_agent(chat_message.message, session_id)
+        response = await run_amma_agent(
+            chat_message.message, session_id, chat_message.budget_seconds
+        )
+        # Mirror the reply to the session's WebSocket, on whichever worker holds it.
+        # Not logged: clients fall back to REST while their socket is down, and
+        # the reply would show twice once the reconnect replayed it.
+        await manager.send_message(session_id, {
+            "type": "response",
+            "content": response
+        }, log=False)
         return ChatResponse(
             response=response,
             session_id=session_id,
             status="success"
         )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    except ServerBusyError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(BUSY_RETRY_AFTER)}
+        )
+    except Exception:
+        logger.exception("Chat request failed for session %s", session_id)
+        raise HTTPException(status_code=500, detail=ERROR_MESSAGE)
+
+
+async def seed_greeting(session_id: str, greeting: str):
+    """Record a pooled greeting as the session's first turn.
+
+    The thread gets the same history a live greeting would have produced, so
+    the conversation continues exactly as if the model had just answered.
+    """
+    async with hold_session(session_id):
+        session_data = get_session(session_id)
+        await agent.aupdate_state(
+            thread_config(session_id),
+            {"messages": [HumanMessage(content=GREETING_TRIGGER), AIMessage(content=greeting)]},
+            as_node="amma",
+        )
+        await finish_turn(session_id, session_data, None)
+
+
+async def send_busy(session_id: str, reason: str):
+    """Tell a WebSocket client the server is saturated and when to retry."""
+    await manager.send_message(session_id, {
+        "type": "busy",
+        "content": reason,
+        "retry_after": BUSY_RETRY_AFTER
+    })
 
 
 @app.websocket("/ws/{session_id}")
-async def websocket_endpoint(websocket: WebSocket, session_id: str):
-    """WebSocket endpoint for streaming responses."""
-    await manager.connect(websocket, session_id)
+async def websocket_endpoint(
+    websocket: WebSocket,
+    session_id: str,
+    after: Optional[int] = None,
+    epoch: Optional[str] = None,
+):
+    """WebSocket endpoint for streaming responses.
+
+    A client resuming after a dropped connection passes the last frame
+    ``offset`` and ``epoch`` it received as ``?after=`` and ``?epoch=`` and
+    gets the missed frames first.
+    """
+    await manager.connect(websocket, session_id, after, epoch)
     
     # Send automatic greeting when client connects (only for new sessions)
     try:
         # Check if this is a new session (no messages yet)
-        is_new_session = session_id not in sessions or len(sessions[session_id]["state"].messages) == 0
+        existing = sessions.get(session_id)
+        is_new_session = existing is None or existing["turns"] == 0
         
-        if is_new_session:
+        greeting = greeting_pool.take() if is_new_session else None
+        if greeting is not None:
+            # Serve a pooled greeting without calling the model
+            await seed_greeting(session_id, greeting)
+            await stream_response(session_id, greeting)
+        elif is_new_session:
             # Send typing indicator
             await manager.send_message(session_id, {
                 "type": "typing",
                 "content": "AMMA is preparing to greet you..."
             })
             
-            # Get AMMA's greeting
-            greeting_response = await run_amma_agent("hey", session_id)
-            
-            # Stream greeting response
-            await stream_response(session_id, greeting_response)
+            # Get and stream AMMA's greeting
+            if TOKEN_STREAMING:
+                await stream_agent_response(session_id, GREETING_TRIGGER)
+            else:
+                greeting_response = await run_amma_agent(GREETING_TRIGGER, session_id)
+                await stream_response(session_id, greeting_response)
         else:
             pass
         
-    except Exception as e:
+    except ServerBusyError as e:
+        await send_busy(session_id, str(e))
+    except Exception:
+        logger.exception("Greeting failed for session %s", session_id)
         await manager.send_message(session_id, {
             "type": "error",
-            "content": f"Error: {str(e)}"
+            "content": ERROR_MESSAGE
         })
     
     try:
@@ -248,6 +928,11 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             data = await websocket.receive_text()
             message_data = json.loads(data)
             message = message_data.get("message", "")
+            try:
+                budget_seconds = parse_budget(message_data.get("budget_seconds"), MAX_TURN_BUDGET)
+            except ValueError as e:
+                await manager.send_message(session_id, {"type": "error", "content": str(e)})
+                continue
             
             if message:
                 try:
@@ -257,20 +942,23 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                         "content": "AMMA is thinking..."
                     })
                     
-                    # Get response from AMMA
-                    response = await run_amma_agent(message, session_id)
-                    
-                    # Send streaming response character by character
-                    await stream_response(session_id, response)
+                    if BACKGROUND_JOBS:
+                        # Keeps running, and buffering frames, if the socket drops
+                        await start_job(session_id, message, budget_seconds)
+                    else:
+                        await run_turn(session_id, message, budget_seconds)
                     
-                except Exception as e:
+                except ServerBusyError as e:
+                    await send_busy(session_id, str(e))
+                except Exception:
+                    logger.exception("Turn failed for session %s", session_id)
                     await manager.send_message(session_id, {
                         "type": "error",
-                        "content": f"Error: {str(e)}"
+                        "content": ERROR_MESSAGE
                     })
                     
     except WebSocketDisconnect:
-        manager.disconnect(session_id)
+        await manager.disconnect(session_id, websocket)
 
 
 @app.get("/health")
@@ -284,16 +972,41 @@ async def get_active_sessions():
     """Get information about active sessions (for debugging)."""
     return {
         "active_sessions": len(sessions),
-        "websocket_connections": len(manager.active_connections),
-        "session_ids": list(sessions.keys())
+        "websocket_connections": await broker.connection_count(),
+        "worker_connections": len(manager.active_connections),
+        "session_ids": sessions.session_ids(),
+        "store": sessions.stats(),
+        "turns": turn_stats,
+        "greetings": greeting_pool.stats()
     }
 
 
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Get a background job's status."""
+    job = await events.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/sessions/{session_id}/events")
+async def get_session_events(session_id: str, after: int = 0, epoch: Optional[str] = None):
+    """Get the frames sent to a session after an offset, for polling clients."""
+    return {"session_id": session_id, "events": await events.read(session_id, after, epoch)}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: node latencies, tokens, revisions, errors and counters."""
+    return render_metrics()
+
+
 @app.delete("/sessions/{session_id}")
 async def clear_session(session_id: str):
     """Clear a specific session."""
-    if session_id in sessions:
-        del sessions[session_id]
+    if sessions.delete(session_id):
+        await forget_session(session_id)
         return {"message": f"Session {session_id} cleared"}
     else:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -0,0 +1 @@
+"""Offline benchmarks for AMMA, driven by the fake chat model."""
@@ -0,0 +1,203 @@
+"""Benchmark the AMMA graph in-process with the fake chat model.
+
+Measures per-node latency, full story-turn latency and the cost of the
+revision loop. No network access or API key is needed::
+
+    python -m benchmarks.bench_graph --preset scripted --runs 20
+
+``--drafts N`` generates N speculative drafts per attempt (``Context.story_drafts``);
+``--budget S`` sets the turn budget compared against unbounded turns.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List
+from uuid import uuid4
+
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import InMemorySaver
+
+from benchmarks.common import print_table
+from src.amma.checkpoint import thread_config
+from src.amma.context import Context
+from src.amma.fake import FAKE_PRESETS
+from src.amma.graph import compile_graph
+from src.amma.metrics import DEGRADATIONS, prompt_cache_ratios
+from src.amma.utils import clear_model_cache
+
+STORY_REQUEST = "My name is Mia, please tell me a story"
+REVISION_REQUEST = "make the dragon friendlier"
+
+# Editor script for the revision benchmark: one rejection, then approval
+REVISION_SCRIPT = ["NEEDS_REVISION\n- Tone: make the ending softer", "APPROVED"]
+
+
+async def timed_turn(agent, session_id: str, message: str, context: Context) -> Dict[str, float]:
+    """Run one turn and return per-node durations plus the total.
+
+    ``story shown`` is the time until the first story reached the child.
+    """
+    durations: Dict[str, float] = defaultdict(float)
+    start = last = time.perf_counter()
+    # Each update arrives when its node finishes, so the gap since the
+    # previous update is that node's run time
+    async for update in agent.astream(
+        {"messages": [HumanMessage(content=message)]},
+        thread_config(session_id),
+        context=context,
+        stream_mode="updates",
+    ):
+        now = time.perf_counter()
+        for node in update:
+            durations[node] += now - last
+            if node == "story_presenter" and "story shown" not in durations:
+                durations["story shown"] = now - start
+        last = now
+    durations["turn"] = time.perf_counter() - start
+    return durations
+
+
+async def bench_story_turns(preset: str, runs: int, drafts: int = 1) -> Dict[str, List[float]]:
+    """Time a greeting followed by a story request in fresh sessions."""
+    agent = compile_graph(InMemorySaver())
+    context = Context(model=f"fake/{preset}", story_drafts=drafts)
+    samples: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(runs):
+        session_id = str(uuid4())
+        greeting = await timed_turn(agent, session_id, "hi", context)
+        samples["greeting turn"].append(greeting["turn"])
+        story = await timed_turn(agent, session_id, STORY_REQUEST, context)
+        for node, seconds in story.items():
+            samples["story turn" if node == "turn" else node].append(seconds)
+    return samples
+
+
+async def bench_revisions(preset: str, runs: int, drafts: int = 1) -> Dict[str, List[float]]:
+    """Compare story turns that are approved at once with one revision round."""
+    samples: Dict[str, List[float]] = {}
+    base = FAKE_PRESETS[preset]
+    for label, editor in (("approved first time", None), ("one revision", REVISION_SCRIPT)):
+        name = f"{preset}-bench-revisions"
+        FAKE_PRESETS[name] = {**base, "scripts": {"editor": editor} if editor else {}}
+        clear_model_cache()
+        agent = compile_graph(InMemorySaver())
+        context = Context(model=f"fake/{name}", story_drafts=drafts)
+        turns = []
+        for _ in range(runs):
+            durations = await timed_turn(agent, str(uuid4()), STORY_REQUEST, context)
+            turns.append(durations["turn"])
+        samples[label] = turns
+        del FAKE_PRESETS[name]
+    clear_model_cache()
+    return samples
+
+
+async def bench_child_revision(preset: str, runs: int) -> Dict[str, List[float]]:
+    """Compare a child's revision applied as a paragraph patch and as a full rewrite."""
+    samples: Dict[str, List[float]] = {}
+    for label, patch in (("paragraph patch", True), ("full rewrite", False)):
+        agent = compile_graph(InMemorySaver())
+        context = Context(model=f"fake/{preset}", patch_revisions=patch)
+        turns = []
+        for _ in range(runs):
+            session_id = str(uuid4())
+            await timed_turn(agent, session_id, STORY_REQUEST, context)
+            durations = await timed_turn(agent, session_id, REVISION_REQUEST, context)
+            turns.append(durations["turn"])
+        samples[label] = turns
+    return samples
+
+
+async def bench_optimistic(preset: str, runs: int) -> Dict[str, List[float]]:
+    """Compare time-to-story with and without optimistic presentation.
+
+    The editor always runs (no local pre-check) and rejects every other
+    story, so both the confirmed and the corrected path are exercised.
+    """
+    samples: Dict[str, List[float]] = defaultdict(list)
+    name = f"{preset}-bench-optimistic"
+    FAKE_PRESETS[name] = {**FAKE_PRESETS[preset], "scripts": {"editor": ["APPROVED", *REVISION_SCRIPT]}}
+    clear_model_cache()
+    for label, optimistic in (("evaluated", False), ("optimistic", True)):
+        agent = compile_graph(InMemorySaver())
+        context = Context(
+            model=f"fake/{name}", optimistic_presentation=optimistic, local_evaluation=False
+        )
+        for _ in range(runs):
+            durations = await timed_turn(agent, str(uuid4()), STORY_REQUEST, context)
+            samples[f"{label}: shown"].append(durations["story shown"])
+            samples[f"{label}: turn"].append(durations["turn"])
+    del FAKE_PRESETS[name]
+    clear_model_cache()
+    return samples
+
+
+async def bench_budget(preset: str, runs: int, budget: float) -> Dict[str, List[float]]:
+    """Compare story turns with and without a latency budget.
+
+    The editor rejects every story, the worst case for the revision loop;
+    with a budget the turn degrades instead of revising until the limit.
+    """
+    samples: Dict[str, List[float]] = defaultdict(list)
+    name = f"{preset}-bench-budget"
+    FAKE_PRESETS[name] = {**FAKE_PRESETS[preset], "scripts": {"editor": REVISION_SCRIPT[:1]}}
+    clear_model_cache()
+    for label, seconds in (("unbounded", 0.0), (f"{budget:g}s budget", budget)):
+        agent = compile_graph(InMemorySaver())
+        context = Context(
+            model=f"fake/{name}", turn_budget_seconds=seconds, local_evaluation=False
+        )
+        for _ in range(runs):
+            durations = await timed_turn(agent, str(uuid4()), STORY_REQUEST, context)
+            samples[f"{label}: turn"].append(durations["turn"])
+    del FAKE_PRESETS[name]
+    clear_model_cache()
+    return samples
+
+
+async def main() -> None:
+    """Run the graph benchmarks and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--preset", default="scripted", choices=sorted(FAKE_PRESETS))
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--drafts", type=int, default=1, help="Speculative drafts per attempt")
+    parser.add_argument("--budget", type=float, default=15.0, help="Turn budget in seconds")
+    args = parser.parse_args()
+
+    label = f"fake/{args.preset}, {args.drafts} draft(s), ms"
+    print_table(
+        f"Story turns ({label})",
+        await bench_story_turns(args.preset, args.runs, args.drafts),
+    )
+    print_table(
+        f"Revision loop ({label})",
+        await bench_revisions(args.preset, args.runs, args.drafts),
+    )
+    print_table(
+        f"Child revision (fake/{args.preset}, ms)",
+        await bench_child_revision(args.preset, args.runs),
+    )
+    print_table(
+        f"Optimistic presentation (fake/{args.preset}, ms)",
+        await bench_optimistic(args.preset, args.runs),
+    )
+    print_table(
+        f"Turn budget (fake/{args.preset}, ms)",
+        await bench_budget(args.preset, args.runs, args.budget),
+    )
+    print("\nDegraded steps")
+    for labels, count in sorted(DEGRADATIONS.values.items()):
+        print(f"{dict(labels)['kind']:<24}{count:>9.0f}")
+
+    # The fake model simulates prefix caching, so this reflects prompt layout
+    print("\nPrompt tokens served from the (simulated) provider cache")
+    for node, ratio in sorted(prompt_cache_ratios().items()):
+        print(f"{node:<24}{ratio:>9.0%}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""Micro-benchmark: CPU cost of building node system prompts.
+
+Compares rendering each prompt with ``str.format`` over the whole template
+from a full ``State`` dump (how prompts used to be built) against the
+precompiled templates in ``src.amma.prompt_layout``, over many distinct
+sessions::
+
+    python -m benchmarks.bench_prompts --sessions 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from datetime import UTC, datetime
+from typing import Any, Callable, Dict, List
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.amma.prompt_layout import (
+    AMMA_TEMPLATE,
+    STORY_CREATOR_TEMPLATE,
+    STORY_EDITOR_TEMPLATE,
+    PromptTemplate,
+)
+from src.amma.state import State
+
+_STORY = "The little moon hummed softly over the quiet meadow. " * 60
+
+
+def make_states(count: int) -> List[State]:
+    """Build ``count`` distinct mid-conversation states."""
+    return [
+        State(
+            messages=[HumanMessage(content=f"hi, I am child {i}"), AIMessage(content=_STORY)] * 3,
+            child_name=f"Child{i}",
+            story_theme=f"dragons number {i}",
+            generated_story=_STORY if i % 2 else None,
+            suggested_revisions="make it softer" if i % 3 == 0 else None,
+        )
+        for i in range(count)
+    ]
+
+
+def format_full(template: PromptTemplate) -> Callable[[State], str]:
+    """Render the old way: dump the whole state and format the complete template."""
+    full = template.prefix + "".join(
+        literal + ("{" + field + "}" if field else "") for literal, field in template._parts
+    )
+
+    def render(state: State) -> str:
+        values: Dict[str, Any] = {
+            k: v or template.defaults.get(k, "") for k, v in state.model_dump().items()
+        }
+        return full.format(system_time=datetime.now(tz=UTC).isoformat(), **values)
+
+    return render
+
+
+def time_per_call(render: Callable[[State], str], states: List[State]) -> float:
+    """Return the mean seconds per render over ``states``."""
+    start = time.perf_counter()
+    for state in states:
+        render(state)
+    return (time.perf_counter() - start) / len(states)
+
+
+def main() -> None:
+    """Run the prompt rendering benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10_000)
+    args = parser.parse_args()
+
+    states = make_states(args.sessions)
+    print(f"\nPrompt rendering over {args.sessions} sessions (microseconds per call)")
+    print(f"{'':<16}{'format + dump':>16}{'precompiled':>14}{'speedup':>10}")
+    templates = {
+        "amma": (AMMA_TEMPLATE, {}),
+        "story_creator": (STORY_CREATOR_TEMPLATE, {}),
+        "story_editor": (STORY_EDITOR_TEMPLATE, {"generated_story": _STORY}),
+    }
+    for name, (template, overrides) in templates.items():
+        old = time_per_call(format_full(template), states)
+        new = time_per_call(lambda state: template.render(state, **overrides), states)
+        print(f"{name:<16}{old * 1e6:>16.1f}{new * 1e6:>14.1f}{old / new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
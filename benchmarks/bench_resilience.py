@@ -0,0 +1,89 @@
+"""Measure timeouts, hedging and failover against a flaky or failing model.
+
+Story turns run against ``fake/flaky`` (one call in ten stalls, one in twenty
+fails) with and without protection, and against ``fake/failing`` with a
+fallback model, where the circuit breaker soon stops calling it::
+
+    python -m benchmarks.bench_resilience --runs 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import Any, Dict, List, Tuple
+from uuid import uuid4
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from benchmarks.bench_graph import STORY_REQUEST, timed_turn
+from benchmarks.common import print_table
+from src.amma.context import Context
+from src.amma.fake import FAKE_PRESETS
+from src.amma.graph import compile_graph
+from src.amma.metrics import FAILOVERS, HEDGED_CALLS, LLM_FAILURES
+
+# Shorter stories keep the runs quick; stalls still dwarf a normal call
+STORY_WORDS = 150
+FALLBACK = "fake/small"
+
+# Preset, and the Context settings under test
+SCENARIOS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    "flaky, unprotected": (
+        "flaky",
+        {"model_timeout_seconds": 0, "creator_timeout_seconds": 0, "hedge_percentile": 0},
+    ),
+    "flaky, timeout+hedge": ("flaky", {"model_timeout_seconds": 6, "creator_timeout_seconds": 6}),
+    "flaky, +fallback": (
+        "flaky",
+        {"model_timeout_seconds": 6, "creator_timeout_seconds": 6, "fallback_model": FALLBACK},
+    ),
+    "down, +fallback": ("failing", {"fallback_model": FALLBACK}),
+}
+
+
+async def bench_scenario(
+    index: int, preset: str, settings: Dict[str, Any], runs: int
+) -> Tuple[List[float], int]:
+    """Time story turns for one scenario; returns turn times and failed turns."""
+    # A preset per scenario, so breakers and latency samples start fresh
+    name = f"bench-resilience-{index}"
+    FAKE_PRESETS[name] = {**FAKE_PRESETS[preset], "story_words": STORY_WORDS}
+    agent = compile_graph(InMemorySaver())
+    context = Context(model=f"fake/{name}", local_evaluation=False, **settings)
+    turns: List[float] = []
+    failed = 0
+    for _ in range(runs):
+        try:
+            durations = await timed_turn(agent, str(uuid4()), STORY_REQUEST, context)
+        except Exception:
+            failed += 1
+            continue
+        turns.append(durations["turn"])
+    del FAKE_PRESETS[name]
+    return turns, failed
+
+
+async def main() -> None:
+    """Run every scenario and print latencies and what the protections did."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=40)
+    args = parser.parse_args()
+
+    samples: Dict[str, List[float]] = {}
+    failures: Dict[str, int] = {}
+    for index, (label, (preset, settings)) in enumerate(SCENARIOS.items()):
+        samples[label], failures[label] = await bench_scenario(index, preset, settings, args.runs)
+    print_table("Story turns (ms)", samples)
+
+    print("\nFailed turns")
+    for label, count in failures.items():
+        print(f"{label:<24}{count:>6}")
+    print("\nProtections")
+    for counter in (LLM_FAILURES, HEDGED_CALLS, FAILOVERS):
+        for labels, count in sorted(counter.values.items()):
+            print(f"{counter.name:<26}{','.join(f'{k}={v}' for k, v in labels):<56}{count:>6.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""Benchmark the FastAPI server with concurrent WebSocket sessions.
+
+Starts ``app.app`` in-process on a local port with the fake chat model, opens
+N sessions at once, and times the greeting and a story request for each::
+
+    python -m benchmarks.bench_server --sessions 50 --preset scripted
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import time
+from typing import Dict, List
+from uuid import uuid4
+
+from benchmarks.common import print_table
+
+STORY_REQUEST = "My name is Mia, please tell me a story"
+
+# Frames that end a turn from the client's point of view
+_TERMINAL_FRAMES = {"stream_end", "response", "busy", "error"}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _receive_turn(ws) -> Dict[str, float]:
+    """Read frames until the turn ends; return first-chunk and end times."""
+    first_chunk = None
+    while True:
+        frame = json.loads(await ws.recv())
+        if first_chunk is None and frame["type"] in ("stream_chunk", "response"):
+            first_chunk = time.perf_counter()
+        if frame["type"] in _TERMINAL_FRAMES:
+            return {"first_chunk": first_chunk or time.perf_counter(), "end": time.perf_counter(),
+                    "ok": frame["type"] in ("stream_end", "response")}
+
+
+async def run_session(url: str, samples: Dict[str, List[float]]) -> None:
+    """Connect, wait for the greeting, ask for a story and wait for it."""
+    import websockets
+
+    start = time.perf_counter()
+    async with websockets.connect(f"{url}/ws/{uuid4()}", max_size=None) as ws:
+        greeting = await _receive_turn(ws)
+        samples["greeting"].append(greeting["end"] - start)
+
+        sent = time.perf_counter()
+        await ws.send(json.dumps({"message": STORY_REQUEST}))
+        story = await _receive_turn(ws)
+        if not story["ok"]:
+            samples["failed"].append(story["end"] - sent)
+            return
+        samples["story first chunk"].append(story["first_chunk"] - sent)
+        samples["story turn"].append(story["end"] - sent)
+
+
+async def main() -> None:
+    """Run the server benchmark and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent sessions")
+    parser.add_argument("--preset", default="scripted")
+    parser.add_argument(
+        "--stream-delay", default="0", help="AMMA_STREAM_DELAY for pooled greetings"
+    )
+    args = parser.parse_args()
+
+    # Configuration is read at import time, so set it before loading the app
+    os.environ["MODEL"] = f"fake/{args.preset}"
+    os.environ.setdefault("AMMA_STREAM_DELAY", args.stream_delay)
+
+    import uvicorn
+
+    from app import app
+
+    port = _free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", ws="websockets")
+    )
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    samples: Dict[str, List[float]] = {
+        "greeting": [], "story first chunk": [], "story turn": [], "failed": []
+    }
+    try:
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(run_session(f"ws://127.0.0.1:{port}", samples) for _ in range(args.sessions))
+        )
+        elapsed = time.perf_counter() - start
+    finally:
+        server.should_exit = True
+        await serve
+
+    print_table(f"{args.sessions} concurrent sessions (fake/{args.preset}, ms)", samples)
+    completed = len(samples["story turn"])
+    print(f"\n{completed} stories in {elapsed:.2f}s: {completed / elapsed:.1f} stories/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,110 @@
+"""Compare model tiering setups by latency and cost per story turn.
+
+Runs greeting + story turns with every node on the large model, with AMMA
+and the editor moved to a small model, and with everything on the small
+model. Fake presets stand in for the models and are priced like the models
+they imitate::
+
+    python -m benchmarks.bench_tiers --runs 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Tuple
+from uuid import uuid4
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from benchmarks.bench_graph import STORY_REQUEST, timed_turn
+from benchmarks.common import print_table
+from src.amma.context import Context
+from src.amma.graph import compile_graph
+from src.amma.metrics import LLM_CALLS, TOKENS, token_usage
+
+LARGE = "fake/scripted"
+SMALL = "fake/small"
+
+# USD per 1M tokens (prompt, cached prompt, completion) of the imitated models:
+# gpt-4o for the large preset, gpt-4o-mini for the small one
+PRICES: Dict[str, Tuple[float, float, float]] = {
+    LARGE: (2.50, 1.25, 10.00),
+    SMALL: (0.15, 0.075, 0.60),
+}
+
+# Model per tier (amma, creator, evaluator)
+SETUPS: Dict[str, Tuple[str, str, str]] = {
+    "all large": (LARGE, LARGE, LARGE),
+    "tiered": (SMALL, LARGE, SMALL),
+    "all small": (SMALL, SMALL, SMALL),
+}
+
+NODE_TIERS = {"amma": "amma", "story_creator": "creator", "story_evaluator": "evaluator"}
+
+
+def cost(model: str, usage: Dict[str, float]) -> float:
+    """Price a model's token usage in USD."""
+    prompt_price, cached_price, completion_price = PRICES[model]
+    cached = usage.get("cached_prompt", 0)
+    uncached = usage.get("prompt", 0) - cached
+    return (
+        uncached * prompt_price + cached * cached_price
+        + usage.get("completion", 0) * completion_price
+    ) / 1_000_000
+
+
+async def bench_setup(
+    models: Tuple[str, str, str], runs: int
+) -> Tuple[Dict[str, List[float]], Dict[str, float]]:
+    """Time story turns for one setup and price its LLM usage per turn."""
+    TOKENS.values.clear()
+    LLM_CALLS.values.clear()
+    amma_model, creator_model, evaluator_model = models
+    agent = compile_graph(InMemorySaver())
+    # The editor sees every story, so its tier always shows up in the numbers
+    context = Context(
+        amma_model=amma_model,
+        creator_model=creator_model,
+        evaluator_model=evaluator_model,
+        local_evaluation=False,
+    )
+    samples: Dict[str, List[float]] = defaultdict(list)
+    for _ in range(runs):
+        session_id = str(uuid4())
+        await timed_turn(agent, session_id, "hi", context)
+        durations = await timed_turn(agent, session_id, STORY_REQUEST, context)
+        for node, seconds in durations.items():
+            if node in NODE_TIERS or node == "turn":
+                samples["story turn" if node == "turn" else node].append(seconds)
+    costs: Dict[str, float] = defaultdict(float)
+    for (node, model), usage in token_usage().items():
+        costs[NODE_TIERS.get(node, node)] += cost(model, usage) / runs
+    return samples, costs
+
+
+async def main() -> None:
+    """Run every tiering setup and print latency and cost tables."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    costs_by_setup: Dict[str, Dict[str, float]] = {}
+    for name, models in SETUPS.items():
+        samples, costs_by_setup[name] = await bench_setup(models, args.runs)
+        print_table(f"{name}: amma={models[0]}, creator={models[1]}, "
+                    f"evaluator={models[2]} (ms)", samples)
+
+    tiers = ("amma", "creator", "evaluator")
+    print("\nCost per greeting + story (USD)")
+    print(f"{'':<24}" + "".join(f"{tier:>12}" for tier in tiers) + f"{'total':>12}")
+    for name, costs in costs_by_setup.items():
+        print(
+            f"{name:<24}" + "".join(f"{costs.get(tier, 0):>12.5f}" for tier in tiers)
+            + f"{sum(costs.values()):>12.5f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
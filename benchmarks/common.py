@@ -0,0 +1,38 @@
+"""Shared helpers for the benchmark scripts."""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Return the nearest-rank percentile of ``samples``."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Return count, mean, p50, p99 and max of ``samples`` (in seconds)."""
+    return {
+        "n": len(samples),
+        "mean": sum(samples) / len(samples) if samples else 0.0,
+        "p50": percentile(samples, 50),
+        "p99": percentile(samples, 99),
+        "max": max(samples, default=0.0),
+    }
+
+
+def print_table(title: str, rows: Dict[str, Sequence[float]]) -> None:
+    """Print latency summaries (in milliseconds) for each named row."""
+    print(f"\n{title}")
+    print(f"{'':<24}{'n':>6}{'mean':>10}{'p50':>10}{'p99':>10}{'max':>10}")
+    for name, samples in rows.items():
+        s = summarize(samples)
+        print(
+            f"{name:<24}{s['n']:>6}"
+            + "".join(f"{s[k] * 1000:>10.1f}" for k in ("mean", "p50", "p99", "max"))
+        )
@@ -6,48 +6,39 @@ Before submitting the assignment, describe here in a few sentences what you woul
  i would properly integrate a voice module maybe eleven labs in it as well look around for any mcps to fetch stories to gegnerate classic stories 
 """
 
+import argparse
 import asyncio
 import sys
-from typing import Any, Dict
+import uuid
 
+from langgraph.graph.state import CompiledStateGraph
+
+from src.amma.checkpoint import open_checkpointer, prune_thread, thread_config
 from src.amma.context import Context
-from src.amma.graph import graph
-from src.amma.state import State
+from src.amma.graph import compile_graph
 
 
 class AMMACLI:
     """Simple command-line interface for AMMA agent."""
     
-    def __init__(self):
+    def __init__(self, agent: CompiledStateGraph, session_id: str):
         self.context = Context()
-        self.state_data: Dict[str, Any] = {
-            "messages": [],
-            "is_last_step": False,
-            "child_name": None,
-            "story_theme": None,
-            "generated_story": None,
-            "suggested_revisions": None,
-            "current_story": None,
-            "evaluation_result": None,
-            "evaluation_feedback": None,
-            "revision_count": 0
-        }
+        self.agent = agent
+        self.session_id = session_id
     
     async def process_message(self, user_input: str) -> str:
         """Process user message through AMMA agent."""
         try:
-            # Add user message to state
             from langchain_core.messages import HumanMessage
-            self.state_data["messages"].append(HumanMessage(content=user_input))
-            
-            # Create state object
-            current_state = State(**self.state_data)
-            
-            # Run the agent
-            result = await graph.ainvoke(current_state, config={"context": self.context})
-            
-            # Update our state data with the result
-            self.state_data.update(result)
+
+            # Run the agent; the checkpointer keeps the rest of the conversation
+            result = await self.agent.ainvoke(
+                {"messages": [HumanMessage(content=user_input)]},
+                thread_config(self.session_id),
+                context=self.context
+            )
+            # Only the latest checkpoint is ever read; keep the thread from growing
+            await prune_thread(self.agent.checkpointer, self.session_id)
             
             # Get the last AI message
             messages = result.get("messages", [])
@@ -86,6 +77,14 @@ class AMMACLI:
 
 async def main():
     """Main entry point."""
+    parser = argparse.ArgumentParser(description="Chat with AMMA")
+    parser.add_argument(
+        "--session-id",
+        default=None,
+        help="Resume an existing conversation (e.g. a web session, with AMMA_CHECKPOINTER=sqlite)"
+    )
+    args = parser.parse_args()
+
     # Load environment variables
     try:
         from dotenv import load_dotenv
@@ -100,8 +99,9 @@ async def main():
     
     # Run the CLI
     try:
-        cli = AMMACLI()
-        await cli.run()
+        async with open_checkpointer() as checkpointer:
+            cli = AMMACLI(compile_graph(checkpointer), args.session_id or str(uuid.uuid4()))
+            await cli.run()
     except Exception:
         sys.exit(1)
 
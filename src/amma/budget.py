@@ -0,0 +1,85 @@
+"""Per-turn latency budget.
+
+A turn may carry a budget (``Context.turn_budget_seconds``, or per request).
+The entry node stamps the deadline into state, and the story nodes compare the
+time left with what the next step usually takes in this process. When it does
+not fit they degrade instead of running late:
+
+- ``story_creator`` asks for a shorter story,
+- ``story_evaluator`` skips the LLM editor (local checks still run),
+- a rejected story is presented without another revision round.
+
+Each degradation is recorded in ``State.degradations`` and counted in
+``amma_turn_degradations_total``.
+"""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Any, List, Optional
+
+from src.amma.metrics import DEGRADATIONS, increment, mean_latency
+
+# Degradation kinds
+SHORTENED_STORY = "shortened_story"
+SKIPPED_EVALUATION = "skipped_evaluation"
+SKIPPED_REVISION = "skipped_revision"
+
+# Read-aloud length asked for when a full story would not fit
+SHORT_STORY_MINUTES = 3
+
+# Expected node run times until the node has been observed (seconds)
+DEFAULT_NODE_SECONDS = {"story_creator": 20.0, "story_evaluator": 5.0}
+
+
+def parse_budget(value: Any, max_seconds: float) -> Optional[float]:
+    """Validate a budget sent by a client.
+
+    Args:
+        value: The request's ``budget_seconds``; a number or numeric string.
+        max_seconds: Largest budget the server grants; larger ones are clamped.
+
+    Returns:
+        The budget in seconds, or None if the request did not set one.
+
+    Raises:
+        ValueError: If the value is not a positive number.
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError("budget_seconds must be a positive number")
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        raise ValueError("budget_seconds must be a positive number") from None
+    if math.isnan(seconds) or seconds <= 0:
+        raise ValueError("budget_seconds must be a positive number")
+    return min(seconds, max_seconds)
+
+
+def turn_deadline(budget_seconds: float) -> Optional[float]:
+    """Return the wall-clock deadline for a turn starting now, or None if unbounded."""
+    return time.time() + budget_seconds if budget_seconds > 0 else None
+
+
+def expected_seconds(node: str) -> float:
+    """Return how long ``node`` usually takes: its mean latency so far, or a default."""
+    observed = mean_latency(node)
+    return observed if observed is not None else DEFAULT_NODE_SECONDS.get(node, 0.0)
+
+
+def can_afford(deadline: Optional[float], *nodes: str) -> bool:
+    """Return whether ``nodes`` are expected to finish before ``deadline``."""
+    if deadline is None:
+        return True
+    return deadline - time.time() >= sum(expected_seconds(node) for node in nodes)
+
+
+def degrade(degradations: List[str], kind: str) -> List[str]:
+    """Record a degradation once per turn and return the updated list."""
+    if kind in degradations:
+        return degradations
+    increment(DEGRADATIONS, kind=kind)
+    return [*degradations, kind]
@@ -0,0 +1,96 @@
+"""Checkpointers that persist AMMA conversations per thread.
+
+Every graph step writes a checkpoint, and nothing in AMMA reads old ones, so
+``prune_thread`` drops all but a thread's latest checkpoint after each turn.
+Without it a thread grows by several full-state checkpoints per turn, far
+beyond the state size the session store accounts for.
+"""
+
+from __future__ import annotations
+
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional, Set, Tuple
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+
+
+@asynccontextmanager
+async def open_checkpointer(
+    backend: Optional[str] = None, path: Optional[str] = None
+) -> AsyncIterator[BaseCheckpointSaver]:
+    """Open the checkpointer configured for this process.
+
+    Args:
+        backend: ``memory`` or ``sqlite``. Defaults to ``AMMA_CHECKPOINTER``.
+        path: SQLite file path. Defaults to ``AMMA_CHECKPOINT_DB``.
+    """
+    backend = (backend or os.getenv("AMMA_CHECKPOINTER", "memory")).lower()
+    if backend == "memory":
+        yield InMemorySaver()
+    elif backend == "sqlite":
+        try:
+            from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+        except ImportError as e:
+            raise ImportError(
+                "The SQLite checkpointer requires the 'sqlite' extra: pip install -e '.[sqlite]'"
+            ) from e
+        path = path or os.getenv("AMMA_CHECKPOINT_DB", "amma_checkpoints.db")
+        async with AsyncSqliteSaver.from_conn_string(path) as saver:
+            yield saver
+    else:
+        raise ValueError(f"Unknown checkpointer: {backend}")
+
+
+def thread_config(session_id: str) -> dict:
+    """Return the run config addressing a session's persisted thread."""
+    return {"configurable": {"thread_id": session_id}}
+
+
+async def prune_thread(checkpointer: Optional[BaseCheckpointSaver], thread_id: str) -> None:
+    """Delete every checkpoint of a thread except the latest one per namespace.
+
+    The latest checkpoint's pending writes and channel values are kept, so the
+    thread resumes exactly as before. Checkpointers other than the in-memory
+    and SQLite savers are left alone.
+    """
+    if isinstance(checkpointer, InMemorySaver):
+        _prune_in_memory(checkpointer, thread_id)
+        return
+    try:
+        from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+    except ImportError:
+        return
+    if isinstance(checkpointer, AsyncSqliteSaver):
+        async with checkpointer.lock, checkpointer.conn.cursor() as cur:
+            # Checkpoint ids sort by time, as the saver itself relies on
+            for table in ("checkpoints", "writes"):
+                await cur.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_id < ("
+                    "SELECT MAX(checkpoint_id) FROM checkpoints AS latest "
+                    f"WHERE latest.thread_id = {table}.thread_id "
+                    f"AND latest.checkpoint_ns = {table}.checkpoint_ns)",
+                    (thread_id,),
+                )
+            await checkpointer.conn.commit()
+
+
+def _prune_in_memory(saver: InMemorySaver, thread_id: str) -> None:
+    # Channel values live in blobs keyed by version; keep the latest ones
+    kept_blobs: Set[Tuple[str, str, str, Any]] = set()
+    for checkpoint_ns, checkpoints in saver.storage.get(thread_id, {}).items():
+        if not checkpoints:
+            continue
+        latest = max(checkpoints)
+        for checkpoint_id in [c for c in checkpoints if c != latest]:
+            del checkpoints[checkpoint_id]
+        checkpoint = saver.serde.loads_typed(checkpoints[latest][0])
+        kept_blobs.update(
+            (thread_id, checkpoint_ns, channel, version)
+            for channel, version in checkpoint["channel_versions"].items()
+        )
+        for key in [k for k in saver.writes if k[:2] == (thread_id, checkpoint_ns) and k[2] != latest]:
+            del saver.writes[key]
+    for key in [k for k in saver.blobs if k[0] == thread_id and k not in kept_blobs]:
+        del saver.blobs[key]
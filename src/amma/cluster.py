@@ -0,0 +1,296 @@
+"""Coordination between AMMA server workers.
+
+With one worker everything can stay in process. With several (``uvicorn
+--workers N``) a session may be served by any worker, so two things have to
+be shared:
+
+- Delivery: frames for a session are published to a broker and delivered by
+  whichever worker holds the session's WebSocket, so a ``POST /chat`` handled
+  by one worker reaches a socket connected to another.
+- Turn ordering: a session lease keeps two workers from running turns of the
+  same session (and writing its checkpoint thread) at the same time. The
+  holder renews it while the turn runs, however long that takes.
+
+``InProcessBroker`` is the single-worker default. ``SQLiteBroker`` shares a
+SQLite file between the worker processes on one host and polls it for new
+frames; its queries run in a worker thread, so a database locked by another
+worker never stalls this worker's sockets. SQLite's WAL locking does not work across hosts or on network
+filesystems, so workers on several hosts need another backend, which only
+has to implement ``Broker``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+# Delivers a frame to a socket held by this worker
+Deliver = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+def worker_id() -> str:
+    """Return an id unique to this worker process."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Broker(ABC):
+    """Routes WebSocket frames and serializes turns across workers."""
+
+    def __init__(self) -> None:
+        self.worker = worker_id()
+        # Sessions whose WebSocket is connected to this worker
+        self.local: Set[str] = set()
+        self._counters = {"published": 0, "delivered": 0}
+
+    async def register(self, session_id: str) -> None:
+        """Record that this worker holds the session's WebSocket."""
+        self.local.add(session_id)
+
+    async def unregister(self, session_id: str) -> None:
+        """Record that the session's WebSocket left this worker."""
+        self.local.discard(session_id)
+
+    @abstractmethod
+    async def publish(self, session_id: str, message: Dict[str, Any]) -> bool:
+        """Send a frame to the worker holding the session's socket.
+
+        Returns whether the session has a socket on any worker.
+        """
+
+    @abstractmethod
+    async def run(self, deliver: Deliver) -> None:
+        """Deliver frames published for local sockets until cancelled."""
+
+    @abstractmethod
+    def lease(self, session_id: str) -> Any:
+        """Async context manager that holds the session's turn lease."""
+
+    @abstractmethod
+    async def connection_count(self) -> int:
+        """Return the number of WebSockets connected across all workers."""
+
+    def close(self) -> None:
+        """Release shared resources held by this worker."""
+
+    def stats(self) -> Dict[str, int]:
+        """Return publish and delivery counters."""
+        return {**self._counters, "local_connections": len(self.local)}
+
+
+class InProcessBroker(Broker):
+    """Broker for a single worker: every socket is local."""
+
+    async def publish(self, session_id: str, message: Dict[str, Any]) -> bool:
+        """Report whether the socket is local; frames for other sessions are dropped."""
+        return session_id in self.local
+
+    async def run(self, deliver: Deliver) -> None:
+        """Return at once; nothing is ever published to another worker."""
+
+    @asynccontextmanager
+    async def lease(self, session_id: str) -> AsyncIterator[None]:
+        """Yield at once; the server's per-session lock already orders turns."""
+        yield
+
+    async def connection_count(self) -> int:
+        """Return the number of local WebSockets."""
+        return len(self.local)
+
+
+class SQLiteBroker(Broker):
+    """Broker backed by a SQLite file shared by all workers.
+
+    Each worker registers its sockets in a ``connections`` table, appends
+    frames for sockets held elsewhere to ``frames`` and polls that table for
+    frames addressed to its own sockets. Leases are rows with an expiry that
+    the holder renews every ``lease_ttl / 3`` seconds, so a crashed worker
+    cannot block a session for longer than ``lease_ttl`` while a long turn
+    keeps its lease.
+    """
+
+    def __init__(
+        self,
+        path: str = "amma_broker.db",
+        poll_interval: float = 0.02,
+        retention: float = 60.0,
+        lease_ttl: float = 300.0,
+    ):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.lease_ttl = lease_ttl
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS frames ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, "
+            "payload TEXT NOT NULL, created_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS connections ("
+            "session_id TEXT PRIMARY KEY, worker TEXT NOT NULL, connected_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS leases ("
+            "session_id TEXT PRIMARY KEY, worker TEXT NOT NULL, expires_at REAL NOT NULL);"
+        )
+        self._lock = threading.Lock()
+        # Only frames published after this worker started are delivered
+        self._last_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM frames").fetchone()[0]
+
+    def _execute(self, sql: str, params: Tuple[Any, ...] = ()) -> None:
+        with self._lock:
+            self._conn.execute(sql, params)
+
+    async def register(self, session_id: str) -> None:
+        """Claim the session's socket; a reconnect moves it to this worker."""
+        await super().register(session_id)
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO connections (session_id, worker, connected_at) "
+            "VALUES (?, ?, ?)",
+            (session_id, self.worker, time.time()),
+        )
+
+    async def unregister(self, session_id: str) -> None:
+        """Release the session's socket if this worker still holds it."""
+        await super().unregister(session_id)
+        await asyncio.to_thread(
+            self._execute,
+            "DELETE FROM connections WHERE session_id = ? AND worker = ?",
+            (session_id, self.worker),
+        )
+
+    def _publish(self, session_id: str, message: Dict[str, Any]) -> bool:
+        with self._lock:
+            if self._conn.execute(
+                "SELECT 1 FROM connections WHERE session_id = ?", (session_id,)
+            ).fetchone() is None:
+                return False
+            self._conn.execute(
+                "INSERT INTO frames (session_id, payload, created_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(message), time.time()),
+            )
+        return True
+
+    async def publish(self, session_id: str, message: Dict[str, Any]) -> bool:
+        """Queue a frame if another worker holds the session's socket."""
+        if not await asyncio.to_thread(self._publish, session_id, message):
+            return False
+        self._counters["published"] += 1
+        return True
+
+    def _poll(self) -> List[Tuple[str, str]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, session_id, payload FROM frames WHERE id > ? ORDER BY id",
+                (self._last_id,),
+            ).fetchall()
+        if rows:
+            self._last_id = rows[-1][0]
+        return [(session_id, payload) for _, session_id, payload in rows if session_id in self.local]
+
+    def _prune(self) -> None:
+        self._execute("DELETE FROM frames WHERE created_at < ?", (time.time() - self.retention,))
+
+    async def run(self, deliver: Deliver) -> None:
+        """Poll for frames addressed to local sockets and deliver them in order."""
+        last_prune = time.monotonic()
+        while True:
+            for session_id, payload in await asyncio.to_thread(self._poll):
+                await deliver(session_id, json.loads(payload))
+                self._counters["delivered"] += 1
+            if time.monotonic() - last_prune >= self.retention:
+                await asyncio.to_thread(self._prune)
+                last_prune = time.monotonic()
+            await asyncio.sleep(self.poll_interval)
+
+    def _try_lease(self, session_id: str) -> bool:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO leases (session_id, worker, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET worker = excluded.worker, "
+                "expires_at = excluded.expires_at WHERE leases.expires_at < ?",
+                (session_id, self.worker, now + self.lease_ttl, now),
+            )
+            row = self._conn.execute(
+                "SELECT worker FROM leases WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return row is not None and row[0] == self.worker
+
+    def _renew_lease(self, session_id: str) -> None:
+        self._execute(
+            "UPDATE leases SET expires_at = ? WHERE session_id = ? AND worker = ?",
+            (time.time() + self.lease_ttl, session_id, self.worker),
+        )
+
+    async def _heartbeat(self, session_id: str) -> None:
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            await asyncio.to_thread(self._renew_lease, session_id)
+
+    @asynccontextmanager
+    async def lease(self, session_id: str) -> AsyncIterator[None]:
+        """Wait until no other worker runs a turn for the session, then hold it."""
+        while not await asyncio.to_thread(self._try_lease, session_id):
+            await asyncio.sleep(self.poll_interval)
+        heartbeat = asyncio.create_task(self._heartbeat(session_id))
+        try:
+            yield
+        finally:
+            heartbeat.cancel()
+            await asyncio.to_thread(
+                self._execute,
+                "DELETE FROM leases WHERE session_id = ? AND worker = ?",
+                (session_id, self.worker),
+            )
+
+    def _connection_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM connections").fetchone()[0]
+
+    async def connection_count(self) -> int:
+        """Return the number of WebSockets connected across all workers."""
+        return await asyncio.to_thread(self._connection_count)
+
+    def close(self) -> None:
+        """Drop this worker's sockets and leases so others can take over."""
+        with self._lock:
+            self._conn.execute("DELETE FROM connections WHERE worker = ?", (self.worker,))
+            self._conn.execute("DELETE FROM leases WHERE worker = ?", (self.worker,))
+        self.local.clear()
+
+
+def create_broker(backend: Optional[str] = None) -> Broker:
+    """Create the broker configured through environment variables.
+
+    ``AMMA_BROKER`` selects ``memory`` (default, single worker) or ``sqlite``.
+    """
+    backend = (backend or os.getenv("AMMA_BROKER", "memory")).lower()
+    if backend == "memory":
+        return InProcessBroker()
+    if backend == "sqlite":
+        return SQLiteBroker(
+            path=os.getenv("AMMA_BROKER_DB", "amma_broker.db"),
+            poll_interval=float(os.getenv("AMMA_BROKER_POLL_INTERVAL", "0.02")),
+            lease_ttl=float(os.getenv("AMMA_SESSION_LEASE_TTL", "300")),
+        )
+    raise ValueError(f"Unknown broker: {backend}")
@@ -4,7 +4,30 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass, field, fields
-from typing import Annotated
+from typing import Annotated, Any, Dict, Optional, Tuple
+
+from src.amma.evaluation import EVALUATOR_MAX_TOKENS
+
+# Nodes that call a model, each configured by its own <tier>_* fields
+MODEL_TIERS = ("amma", "creator", "evaluator")
+
+
+def _from_env(value: str, default: Any) -> Any:
+    """Convert an environment variable to the type of the field's default."""
+    if isinstance(default, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    if default is None:
+        # Optional numeric settings: read numbers as numbers
+        for convert in (int, float):
+            try:
+                return convert(value)
+            except ValueError:
+                pass
+    return value
 
 
 @dataclass(kw_only=True)
@@ -18,10 +41,213 @@ class Context:
         },
     )
 
+    amma_model: str = field(
+        default="",
+        metadata={
+            "description": "Model for AMMA's conversational turns. Empty uses `model`; a "
+            "small, fast model is usually enough for chit-chat and tool calls."
+        },
+    )
+
+    amma_max_tokens: Optional[int] = field(
+        default=None,
+        metadata={"description": "Output token limit for AMMA. None uses the provider default."},
+    )
+
+    amma_temperature: Optional[float] = field(
+        default=None,
+        metadata={"description": "Sampling temperature for AMMA. None uses the provider default."},
+    )
+
+    amma_timeout_seconds: Optional[float] = field(
+        default=None,
+        metadata={
+            "description": "Timeout per AMMA call in seconds. None uses `model_timeout_seconds`."
+        },
+    )
+
+    creator_model: str = field(
+        default="",
+        metadata={
+            "description": "Model that writes and revises stories. Empty uses `model`; this is "
+            "where a large model pays off."
+        },
+    )
+
+    creator_max_tokens: Optional[int] = field(
+        default=None,
+        metadata={
+            "description": "Output token limit for the Story Creator. None uses the provider "
+            "default; keep it above a 10-minute story (about 1,700 tokens)."
+        },
+    )
+
+    creator_temperature: Optional[float] = field(
+        default=None,
+        metadata={
+            "description": "Sampling temperature for the Story Creator. None uses the provider "
+            "default."
+        },
+    )
+
+    creator_timeout_seconds: Optional[float] = field(
+        default=180.0,
+        metadata={
+            "description": "Timeout per Story Creator call in seconds; 0 waits indefinitely. A "
+            "large model can take a minute or more to write a 10-minute story. None uses "
+            "`model_timeout_seconds`."
+        },
+    )
+
+    evaluator_model: str = field(
+        default="",
+        metadata={
+            "description": "Model for the Story Editor's verdicts. Empty uses `model`; a small "
+            "model handles the checklist well."
+        },
+    )
+
+    evaluator_max_tokens: Optional[int] = field(
+        default=EVALUATOR_MAX_TOKENS,
+        metadata={"description": "Output token limit for the Story Editor's verdict."},
+    )
+
+    evaluator_temperature: Optional[float] = field(
+        default=None,
+        metadata={
+            "description": "Sampling temperature for the Story Editor. None uses the provider "
+            "default."
+        },
+    )
+
+    evaluator_timeout_seconds: Optional[float] = field(
+        default=None,
+        metadata={
+            "description": "Timeout per Story Editor call in seconds. None uses "
+            "`model_timeout_seconds`."
+        },
+    )
+
+    fallback_model: str = field(
+        default="",
+        metadata={
+            "description": "Model that serves any tier's call when that tier's model times out, "
+            "fails or has its circuit open. Format: provider/model-name. Empty disables failover."
+        },
+    )
+
+    model_timeout_seconds: float = field(
+        default=60.0,
+        metadata={
+            "description": "Timeout per model call in seconds, for tiers without their own "
+            "<tier>_timeout_seconds; 0 waits indefinitely."
+        },
+    )
+
+    hedge_percentile: float = field(
+        default=95.0,
+        metadata={
+            "description": "Send an identical second request when a call runs longer than this "
+            "percentile of the tier's recent latencies; 0 disables hedging."
+        },
+    )
+
+    history_token_budget: int = field(
+        default=3000,
+        metadata={
+            "description": "Approximate token budget for the conversation history sent to AMMA. "
+            "Older turns are summarized once it is exceeded; 0 disables compaction."
+        },
+    )
+
+    fast_path_routing: bool = field(
+        default=True,
+        metadata={
+            "description": "Handle unambiguous goodbyes and new-story requests with local rules "
+            "instead of an AMMA model call."
+        },
+    )
+
+    local_evaluation: bool = field(
+        default=True,
+        metadata={
+            "description": "Check stories with local rules (length, theme, name, banned words, "
+            "readability) first and only ask the LLM editor about borderline ones."
+        },
+    )
+
+    patch_revisions: bool = field(
+        default=True,
+        metadata={
+            "description": "Apply a child's revision by rewriting only the affected paragraphs "
+            "of the told story instead of regenerating all of it."
+        },
+    )
+
+    coalesce_stories: bool = field(
+        default=True,
+        metadata={
+            "description": "Let concurrent identical story requests (same theme, revisions and "
+            "model) share one generation and verdict, personalized for each child."
+        },
+    )
+
+    turn_budget_seconds: float = field(
+        default=0.0,
+        metadata={
+            "description": "Latency budget per turn in seconds; 0 means unbounded. Near the "
+            "deadline, stories are shortened, evaluation is skipped or revisions are cut."
+        },
+    )
+
+    optimistic_presentation: bool = field(
+        default=False,
+        metadata={
+            "description": "Present a fresh story as soon as it is written and evaluate it "
+            "afterwards; a corrected story replaces it only if the editor rejects it."
+        },
+    )
+
+    story_drafts: int = field(
+        default=1,
+        metadata={
+            "description": "Story drafts generated and evaluated concurrently per attempt. The "
+            "first approved (or best) draft is presented; more drafts cost more tokens but "
+            "rarely need a revision round."
+        },
+    )
+
     def __post_init__(self) -> None:
         """Load configuration from environment variables."""
         for f in fields(self):
             if not f.init:
                 continue
-            if getattr(self, f.name) == f.default:
-                setattr(self, f.name, os.environ.get(f.name.upper(), f.default))
+            env_value = os.environ.get(f.name.upper())
+            if env_value is not None and getattr(self, f.name) == f.default:
+                setattr(self, f.name, _from_env(env_value, f.default))
+
+    def model_settings(self, tier: str) -> Tuple[str, Dict[str, Any]]:
+        """Return the model name and call parameters for a model tier.
+
+        Args:
+            tier: ``amma``, ``creator`` or ``evaluator``.
+
+        Returns:
+            The fully specified model name (falling back to ``model``) and the
+            ``max_tokens``/``temperature`` keyword arguments that are set.
+        """
+        if tier not in MODEL_TIERS:
+            raise ValueError(f"Unknown model tier: {tier}")
+        kwargs: Dict[str, Any] = {}
+        for setting in ("max_tokens", "temperature"):
+            value = getattr(self, f"{tier}_{setting}")
+            if value is not None:
+                kwargs[setting] = value
+        return getattr(self, f"{tier}_model") or self.model, kwargs
+
+    def timeout_seconds(self, tier: str) -> float:
+        """Return the timeout for one call of a model tier; 0 waits indefinitely."""
+        if tier not in MODEL_TIERS:
+            raise ValueError(f"Unknown model tier: {tier}")
+        timeout = getattr(self, f"{tier}_timeout_seconds")
+        return self.model_timeout_seconds if timeout is None else timeout
@@ -0,0 +1,137 @@
+"""Story verdicts: the editor's typed output and a cheap local pre-check."""
+
+from __future__ import annotations
+
+import re
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+# The verdict is a short JSON object; this keeps the editor call cheap
+EVALUATOR_MAX_TOKENS = 300
+
+
+class StoryVerdict(BaseModel):
+    """The story editor's decision on a story."""
+
+    approved: bool = Field(description="True only if the story passes every criterion.")
+    score: int = Field(
+        ge=1, le=10, description="Overall bedtime-story quality from 1 to 10; 8+ is ready to read."
+    )
+    revision_instructions: List[str] = Field(
+        default_factory=list,
+        description="Up to 6 short, concrete fixes for the Story Creator, each naming the "
+        "criterion and a gentle fix. Empty when approved.",
+    )
+
+
+def format_instructions(instructions: List[str]) -> str:
+    """Render revision instructions as a bullet list."""
+    return "\n".join(f"- {instruction}" for instruction in instructions)
+
+
+# ---------------------------------------------------------------------------
+# Local pre-evaluation
+# ---------------------------------------------------------------------------
+
+# Read-aloud pace for a calm bedtime voice, and the 5-10 minute target
+READ_ALOUD_WPM = 130
+TARGET_MINUTES = (5, 10)
+
+# Words that have no place in a bedtime story for ages 5-10
+BANNED_WORDS = frozenset({
+    "blood", "bloody", "kill", "killed", "killing", "dead", "death", "die", "died",
+    "murder", "gun", "knife", "stab", "scream", "screamed", "horror", "terror",
+    "terrified", "nightmare", "monster", "ghost", "demon", "devil", "zombie", "corpse",
+    "skeleton", "torture", "hate", "stupid", "war", "weapon",
+})
+
+# Story-level limits: inside both bounds the story passes, outside the hard
+# bound it is sent back without asking the editor
+_SENTENCE_WORDS = (14, 22)  # average words per sentence (prompt asks for 5-12)
+_READING_EASE = 75  # Flesch reading ease; lower is harder (picture books score 80+)
+
+_STOPWORDS = frozenset({
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "with", "about", "for",
+    "story", "stories", "tale", "bedtime", "my", "me", "i", "who", "that", "is", "are",
+})
+
+_WORD_RE = re.compile(r"[A-Za-z']+")
+_SENTENCE_END_RE = re.compile(r"[.!?]+")
+
+
+def _syllables(word: str) -> int:
+    """Rough English syllable count (vowel groups, silent final e)."""
+    word = word.lower()
+    count = len(re.findall(r"[aeiouy]+", word))
+    if word.endswith("e") and not word.endswith("le") and count > 1:
+        count -= 1
+    return max(1, count)
+
+
+def pre_evaluate(
+    story: str,
+    story_theme: Optional[str],
+    target_minutes: Tuple[int, int] = TARGET_MINUTES,
+) -> Optional[StoryVerdict]:
+    """Check a story with local rules before paying for the LLM editor.
+
+    Returns an approval when every rule passes clearly, a rejection with
+    instructions when a rule fails clearly, and None for borderline stories
+    that need the editor. ``target_minutes`` is the read-aloud length range
+    asked of the creator.
+    """
+    words = _WORD_RE.findall(story)
+    if not words:
+        return StoryVerdict(
+            approved=False, score=1, revision_instructions=["Flow/Coherence: the story is empty."]
+        )
+    lowered = [w.lower() for w in words]
+    sentences = max(1, len([s for s in _SENTENCE_END_RE.split(story) if _WORD_RE.search(s)]))
+    words_per_sentence = len(words) / sentences
+    syllables_per_word = sum(_syllables(w) for w in words) / len(words)
+    reading_ease = 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word
+
+    theme_words = set(_WORD_RE.findall((story_theme or "").lower())) - _STOPWORDS
+    failures: List[str] = []
+    doubtful = False
+
+    # Safety (a "friendly monster" theme may of course mention the monster)
+    banned = sorted(BANNED_WORDS.intersection(lowered) - theme_words)
+    if banned:
+        failures.append(
+            "Safety: replace the words " + ", ".join(f"'{w}'" for w in banned)
+            + " with gentle, calm alternatives."
+        )
+
+    # Length
+    low, high = (minutes * READ_ALOUD_WPM for minutes in target_minutes)
+    if len(words) < low // 2 or len(words) > high * 3 // 2:
+        failures.append(
+            f"Flow/Coherence: the story has {len(words)} words; aim for {low}-{high} "
+            f"({target_minutes[0]}-{target_minutes[1]} minutes read aloud)."
+        )
+    elif not low * 4 // 5 <= len(words) <= high * 11 // 10:
+        doubtful = True
+
+    # Readability
+    if words_per_sentence > _SENTENCE_WORDS[1]:
+        failures.append(
+            f"Age: sentences average {words_per_sentence:.0f} words; keep them to about 5-12."
+        )
+    elif words_per_sentence > _SENTENCE_WORDS[0] or reading_ease < _READING_EASE:
+        doubtful = True
+
+    # Theme: a missing one may just be paraphrased, so ask the editor. The
+    # child's name is not checked; the creator is never given it.
+    vocabulary = set(lowered)
+    if theme_words and not any(
+        w in vocabulary or w.rstrip("s") in vocabulary for w in theme_words
+    ):
+        doubtful = True
+
+    if failures:
+        return StoryVerdict(approved=False, score=3, revision_instructions=failures)
+    if doubtful:
+        return None
+    return StoryVerdict(approved=True, score=8)
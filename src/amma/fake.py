@@ -0,0 +1,352 @@
+"""Deterministic fake chat model for offline benchmarks and tests.
+
+Select it with ``Context.model = "fake/<preset>"``. Presets live in
+``FAKE_PRESETS`` and set the simulated latency, token rate and, optionally,
+scripted replies per role. Without a script the model behaves like a
+cooperative AMMA: it asks for a theme, calls ``update_story_preferences`` when
+the child asks for a story, writes a story of ``story_words`` words and has the
+editor approve it. Presets can also stall or fail a share of calls, to
+exercise timeouts, hedging and failover.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import re
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.messages.utils import count_tokens_approximately
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import Field, PrivateAttr
+
+# A scripted reply: plain text, or {"content": ..., "tool_calls": [...]}
+ScriptedReply = Union[str, Dict[str, Any]]
+
+FAKE_PRESETS: Dict[str, Dict[str, Any]] = {
+    # No delay at all: measures pure framework overhead
+    "instant": {},
+    # Roughly the shape of a hosted model
+    "scripted": {"latency": 0.3, "tokens_per_second": 80.0},
+    # A small, fast hosted model, for comparing model tiers
+    "small": {"latency": 0.15, "tokens_per_second": 250.0},
+    # A hosted model with a long tail: one call in ten stalls, one in twenty fails
+    "flaky": {"latency": 0.3, "tokens_per_second": 80.0, "stall_rate": 0.1, "stall_seconds": 10.0,
+              "fail_rate": 0.05},
+    # A provider that is down
+    "failing": {"latency": 0.3, "fail_rate": 1.0},
+}
+
+_STORY_WORDS = (
+    "the little moon hummed softly while sleepy stars drifted over the quiet meadow "
+    "and a kind dragon curled up beside the glowing lantern to dream"
+).split()
+
+# Simulated provider prompt cache: prefixes are cached in blocks of about
+# 1024 tokens (~4 characters each), like OpenAI's automatic caching
+_CACHE_BLOCK_CHARS = 4096
+_CACHE_MAX_PREFIXES = 10_000
+
+_REVISION_RE = re.compile(r"^\s*(?:please\s+)?(?:make|change|can you make)\b", re.IGNORECASE)
+_THEME_RE = re.compile(r"\bstory\b(?:\s+(?:about|of|with)\s+(?P<theme>[^?!.]+))?", re.IGNORECASE)
+# A length asked of the creator, e.g. "(390 words)"
+_LENGTH_RE = re.compile(r"\((\d+) words\)")
+
+
+def _role(messages: Sequence[BaseMessage]) -> str:
+    """Guess which AMMA node is calling from its system prompt."""
+    system = messages[0].content if messages and isinstance(messages[0], SystemMessage) else ""
+    # Only the opening sentence: each prompt mentions the other roles later on
+    opening = re.split(r"[.\n]", str(system).strip(), maxsplit=1)[0].lower()
+    if "story editor" in opening:
+        return "editor"
+    if "story creator" in opening:
+        return "creator"
+    return "amma"
+
+
+def _verdict_call(text: str, tool_name: str, call_number: int) -> Dict[str, Any]:
+    """Turn a plain-text editor reply into a structured verdict tool call.
+
+    Scripts can keep the classic format: ``APPROVED``, or ``NEEDS_REVISION``
+    followed by ``- instruction`` lines.
+    """
+    approved = text.strip().upper().startswith("APPROVED")
+    instructions = [
+        line.strip().lstrip("-*").strip()
+        for line in text.splitlines()
+        if line.strip().startswith(("-", "*"))
+    ]
+    return {
+        "content": "",
+        "tool_calls": [{
+            "name": tool_name,
+            "args": {
+                "approved": approved,
+                "score": 9 if approved else max(1, 7 - len(instructions)),
+                "revision_instructions": instructions,
+            },
+            "id": f"call_fake_{call_number}",
+        }],
+    }
+
+
+def _patch_call(text: str, tool_name: str, call_number: int) -> Dict[str, Any]:
+    """Turn a plain-text creator reply into a patch of the first paragraph."""
+    return {
+        "content": "",
+        "tool_calls": [{
+            "name": tool_name,
+            "args": {"edits": [{"index": 0, "text": text.split("\n\n", 1)[0]}]},
+            "id": f"call_fake_{call_number}",
+        }],
+    }
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that answers instantly or at a simulated speed, offline."""
+
+    latency: float = Field(default=0.0, description="Seconds before the first token.")
+    tokens_per_second: float = Field(default=0.0, description="Output rate; 0 means instant.")
+    story_words: int = Field(default=600, description="Length of generated stories in words.")
+    scripts: Dict[str, List[ScriptedReply]] = Field(
+        default_factory=dict,
+        description="Replies per role ('amma', 'creator', 'editor'), used in a cycle.",
+    )
+    fail_rate: float = Field(default=0.0, description="Fraction of calls that raise an error.")
+    stall_rate: float = Field(default=0.0, description="Fraction of calls that stall first.")
+    stall_seconds: float = Field(default=0.0, description="Extra delay of a stalled call.")
+
+    _cycles: Dict[str, Iterator[ScriptedReply]] = PrivateAttr(default_factory=dict)
+    _calls: int = PrivateAttr(default=0)
+    _prefixes: Set[int] = PrivateAttr(default_factory=set)
+
+    @property
+    def _llm_type(self) -> str:
+        return "amma-fake"
+
+    def bind_tools(
+        self, tools: Sequence[Any], **kwargs: Any
+    ) -> Runnable[LanguageModelInput, BaseMessage]:
+        """Bind tools like a real provider, converting their schemas."""
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    # ------------------------------------------------------------------
+    # Reply selection
+    # ------------------------------------------------------------------
+
+    def _scripted(self, role: str) -> Optional[ScriptedReply]:
+        if not self.scripts.get(role):
+            return None
+        if role not in self._cycles:
+            self._cycles[role] = itertools.cycle(self.scripts[role])
+        return next(self._cycles[role])
+
+    def _default_reply(self, role: str, messages: Sequence[BaseMessage]) -> ScriptedReply:
+        if role == "editor":
+            return "APPROVED"
+        if role == "creator":
+            length = self.story_words
+            for message in messages:
+                if isinstance(message, HumanMessage) and (match := _LENGTH_RE.search(str(message.content))):
+                    length = min(length, int(match.group(1)))
+            words = itertools.islice(itertools.cycle(_STORY_WORDS), length)
+            text = " ".join(words)
+            # Sentences and paragraphs, like a real story
+            sentences = [s.strip().capitalize() + "." for s in re.findall(r"(?:\S+\s*){1,12}", text)]
+            paragraphs = [" ".join(sentences[i:i + 3]) for i in range(0, len(sentences), 3)]
+            return "\n\n".join(paragraphs)
+
+        last = messages[-1] if messages else None
+        if isinstance(last, ToolMessage):
+            return "Let me make that story for you, my dear."
+        if isinstance(last, HumanMessage) and _REVISION_RE.match(str(last.content)):
+            return {
+                "content": "",
+                "tool_calls": [{
+                    "name": "update_story_preferences",
+                    "args": {"suggested_revisions": str(last.content)},
+                    "id": f"call_fake_{self._calls}",
+                }],
+            }
+        if isinstance(last, HumanMessage):
+            match = _THEME_RE.search(str(last.content))
+            if match:
+                theme = (match.group("theme") or "friendly animals").strip()
+                return {
+                    "content": "",
+                    "tool_calls": [{
+                        "name": "update_story_preferences",
+                        "args": {"story_theme": theme},
+                        "id": f"call_fake_{self._calls}",
+                    }],
+                }
+        return "Hello sweetheart! What is your name, and what story would you like tonight?"
+
+    def _cached_tokens(self, messages: Sequence[BaseMessage]) -> int:
+        """Return how many prompt tokens a prefix cache would have served."""
+        text = "".join(f"{m.type}:{m.content}\n" for m in messages)
+        if len(self._prefixes) > _CACHE_MAX_PREFIXES:
+            self._prefixes.clear()
+        cached = 0
+        for end in range(_CACHE_BLOCK_CHARS, len(text) + 1, _CACHE_BLOCK_CHARS):
+            key = hash(text[:end])
+            if key in self._prefixes:
+                cached = end
+            else:
+                self._prefixes.add(key)
+        return cached // 4
+
+    def _reply(self, messages: List[BaseMessage], **kwargs: Any) -> AIMessage:
+        self._calls += 1
+        # Deterministic: fails once every 1 / fail_rate calls
+        if self.fail_rate and (self._calls * self.fail_rate) % 1 < self.fail_rate:
+            raise RuntimeError("Fake model failure")
+        role = _role(messages)
+        reply = self._scripted(role) or self._default_reply(role, messages)
+        if isinstance(reply, str) and kwargs.get("tools") and role != "amma":
+            # Structured calls: the editor's verdict and the creator's patch
+            tool_name = kwargs["tools"][0]["function"]["name"]
+            if role == "editor":
+                reply = _verdict_call(reply, tool_name, self._calls)
+            else:
+                reply = _patch_call(reply, tool_name, self._calls)
+        if isinstance(reply, str):
+            reply = {"content": reply}
+        message = AIMessage(content=reply.get("content", ""), tool_calls=reply.get("tool_calls", []))
+        # Approximate usage, so token metrics have something to count
+        input_tokens = count_tokens_approximately(messages)
+        output_tokens = count_tokens_approximately([message])
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+            "input_token_details": {
+                "cache_read": min(input_tokens, self._cached_tokens(messages))
+            },
+        }
+        return message
+
+    # ------------------------------------------------------------------
+    # Generation
+    # ------------------------------------------------------------------
+
+    def _chunks(self, message: AIMessage) -> List[AIMessageChunk]:
+        pieces = re.findall(r"\S+\s*|\s+", str(message.content)) or [""]
+        chunks = [AIMessageChunk(content=piece) for piece in pieces]
+        # Tool calls and usage arrive with the last chunk, as with OpenAI
+        chunks[-1] = AIMessageChunk(
+            content=chunks[-1].content,
+            usage_metadata=message.usage_metadata,
+            tool_call_chunks=[
+                {
+                    "name": call["name"],
+                    "args": json.dumps(call["args"]),
+                    "id": call["id"],
+                    "index": i,
+                }
+                for i, call in enumerate(message.tool_calls)
+            ],
+        )
+        return chunks
+
+    def _delay(self, chunk: AIMessageChunk) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second and chunk.content else 0.0
+
+    def _latency(self) -> float:
+        # Deterministic, like failures: stalls once every 1 / stall_rate calls
+        stalled = self.stall_rate and (self._calls * self.stall_rate) % 1 < self.stall_rate
+        return self.latency + (self.stall_seconds if stalled else 0.0)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._reply(messages, **kwargs)
+        time.sleep(self._latency() + sum(self._delay(c) for c in self._chunks(message)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._reply(messages, **kwargs)
+        await asyncio.sleep(self._latency() + sum(self._delay(c) for c in self._chunks(message)))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._reply(messages, **kwargs)
+        time.sleep(self._latency())
+        for chunk in self._chunks(message):
+            time.sleep(self._delay(chunk))
+            if run_manager:
+                run_manager.on_llm_new_token(str(chunk.content), chunk=ChatGenerationChunk(message=chunk))
+            yield ChatGenerationChunk(message=chunk)
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._reply(messages, **kwargs)
+        await asyncio.sleep(self._latency())
+        for chunk in self._chunks(message):
+            await asyncio.sleep(self._delay(chunk))
+            if run_manager:
+                await run_manager.on_llm_new_token(
+                    str(chunk.content), chunk=ChatGenerationChunk(message=chunk)
+                )
+            yield ChatGenerationChunk(message=chunk)
+
+
+def create_fake_model(preset: str, **kwargs: Any) -> FakeChatModel:
+    """Create a fake model from a named preset.
+
+    Extra keyword arguments (e.g. ``temperature``) are accepted and ignored,
+    so fakes can stand in for any configured model.
+    """
+    if preset not in FAKE_PRESETS:
+        raise ValueError(f"Unknown fake model preset: {preset}")
+    return FakeChatModel(**FAKE_PRESETS[preset])
+
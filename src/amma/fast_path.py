@@ -0,0 +1,98 @@
+"""Local intent rules that let unambiguous turns skip the AMMA model call.
+
+Only messages that match a rule completely are handled here; anything else
+goes to the ``amma`` node as before.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+from dataclasses import dataclass
+from typing import Dict, Literal, Optional
+
+# Name set on messages produced by the fast path instead of the model
+FAST_PATH_MESSAGE_NAME = "fast_path"
+
+# Phrases that mean the child is winding down (route_from_amma checks them
+# after the model has replied)
+NATURAL_ENDINGS = ["good night", "goodnight", "bye", "goodbye", "sleep", "tired", "bedtime"]
+
+# Whole goodbye phrases: here the match replaces the model's reply, so a word
+# like "sleep" or "bedtime" on its own (e.g. "a sleepover", "dragons and
+# bedtime" as a theme) is not enough
+_GOODBYE_RE = re.compile(
+    r"\b(?:good ?night|nighty? night|bye(?: bye)?|goodbye|sweet dreams"
+    r"|i'?m (?:so |very |really )?(?:sleepy|tired)"
+    r"|(?:time|going) (?:to|for) (?:sleep|bed))\b"
+)
+
+# Words that mean the child still wants something, asks something or negates
+# the ending, so an ending keyword alone is not enough (e.g. "tell me a
+# bedtime story", "how do dragons sleep", "I'm not tired")
+_AMBIGUOUS_WORDS = re.compile(
+    r"\b(story|stories|tell|read|another|more|again|about|want|can|could|please"
+    r"|how|what|why|where|who|when|do|does|is|not|no|don't|can't|won't)\b"
+)
+
+# Goodbyes are short; longer messages go to the model
+_GOODBYE_MAX_WORDS = 6
+
+_NEW_STORY_RE = re.compile(
+    r"^(?:(?:please|amma|ok|okay)[\s,]+)*"
+    r"(?:(?:can|could|will|would)\s+you\s+)?"
+    r"(?:tell|read|make|give|write)\s+me\s+"
+    r"(?:a|an|another|a\s+new|a\s+different)\s+(?:bedtime\s+)?story\s+"
+    r"(?:about|of|with)\s+"
+    r"(?P<theme>[^?!.]+?)"
+    r"(?:[\s,]+please)?[\s.!?]*$",
+    re.IGNORECASE,
+)
+
+GOODBYE_REPLIES = [
+    "Sweet dreams, my little one. Close your eyes and rest now. Goodnight.",
+    "Goodnight, sweetheart. Sleep well and dream of soft, happy things.",
+    "Sleep well, my dear. AMMA will be right here for another story tomorrow.",
+]
+
+fast_path_stats: Dict[str, int] = {"goodbye": 0, "new_story": 0, "model": 0}
+
+
+@dataclass
+class FastPathIntent:
+    """An intent recognized without calling the model."""
+
+    kind: Literal["goodbye", "new_story"]
+    story_theme: Optional[str] = None
+
+
+def classify_intent(message: str) -> Optional[FastPathIntent]:
+    """Recognize goodbye and plain new-story requests.
+
+    Returns None when the message is ambiguous and needs the model.
+    """
+    normalized = " ".join(message.split())
+    text = normalized.lower()
+
+    match = _NEW_STORY_RE.match(normalized)
+    if match:
+        # Theme is passed on verbatim, as the AMMA prompt requires
+        theme = match.group("theme").strip()
+        if theme:
+            return FastPathIntent(kind="new_story", story_theme=theme)
+
+    words = re.findall(r"[a-z']+", text)
+    if (
+        0 < len(words) <= _GOODBYE_MAX_WORDS
+        and _GOODBYE_RE.search(text)
+        and "?" not in text
+        and not _AMBIGUOUS_WORDS.search(text)
+    ):
+        return FastPathIntent(kind="goodbye")
+
+    return None
+
+
+def goodbye_reply() -> str:
+    """Return a warm goodbye."""
+    return random.choice(GOODBYE_REPLIES)
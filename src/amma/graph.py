@@ -1,127 +1,484 @@
 """AMMA - Conversational bedtime story agent with improved multi-agent architecture."""
 
-from datetime import UTC, datetime
-from typing import Any, Dict, List, Literal, cast
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Literal, Optional, Tuple
+from uuid import uuid4
 
-from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.messages import AIMessage, HumanMessage, RemoveMessage, ToolMessage
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph
+from langgraph.graph.state import CompiledStateGraph
 from langgraph.runtime import Runtime
 
+from src.amma.budget import (
+    SHORT_STORY_MINUTES,
+    SHORTENED_STORY,
+    SKIPPED_EVALUATION,
+    SKIPPED_REVISION,
+    can_afford,
+    degrade,
+    turn_deadline,
+)
 from src.amma.context import Context
-from src.amma.prompts import AMMA_PROMPT, STORY_CREATOR_PROMPT, STORY_EDITOR_PROMPT
+from src.amma.evaluation import (
+    READ_ALOUD_WPM,
+    TARGET_MINUTES,
+    StoryVerdict,
+    format_instructions,
+    pre_evaluate,
+)
+from src.amma.fast_path import (
+    FAST_PATH_MESSAGE_NAME,
+    NATURAL_ENDINGS,
+    classify_intent,
+    fast_path_stats,
+    goodbye_reply,
+)
+from src.amma.history import STORY_MESSAGE_NAME, compact_history
+from src.amma.metrics import (
+    COALESCED_CALLS,
+    EVALUATIONS,
+    INVALID_VERDICTS,
+    OPTIMISTIC_STORIES,
+    REVISION_MODES,
+    STORY_REVISIONS,
+    increment,
+    instrument_node,
+    observe,
+    record_llm_usage,
+)
+from src.amma.prompt_layout import (
+    AMMA_TEMPLATE,
+    STORY_CREATOR_TEMPLATE,
+    STORY_EDITOR_TEMPLATE,
+    STORY_REVISION_TEMPLATE,
+)
+from src.amma.resilience import call_model
+from src.amma.revisions import (
+    StoryPatch,
+    apply_patch,
+    number_paragraphs,
+    split_paragraphs,
+)
+from src.amma.singleflight import story_flights
 from src.amma.state import InputState, State
+from src.amma.story_cache import (
+    depersonalize,
+    normalize,
+    personalize,
+    story_cache,
+    story_key,
+)
 from src.amma.tools import TOOLS, update_story_preferences
-from src.amma.utils import load_chat_model
 
 # ============================================================================
 # AGENT NODES
 # ============================================================================
 
+async def fast_path(state: State, runtime: Runtime[Context]) -> Dict[str, Any]:
+    """Handle unambiguous goodbyes and new-story requests without a model call.
+
+    As the entry node it also starts the turn's latency budget.
+    """
+    context = runtime.context if runtime.context else Context()
+    last_message = state.messages[-1] if state.messages else None
+    turn = {"turn_deadline": turn_deadline(context.turn_budget_seconds), "degradations": []}
+
+    intent = None
+    if context.fast_path_routing and isinstance(last_message, HumanMessage):
+        if isinstance(last_message.content, str):
+            intent = classify_intent(last_message.content)
+
+    if intent is None:
+        fast_path_stats["model"] += 1
+        return turn
+    fast_path_stats[intent.kind] += 1
+
+    if intent.kind == "goodbye":
+        return {
+            **turn,
+            "messages": [AIMessage(content=goodbye_reply(), name=FAST_PATH_MESSAGE_NAME)],
+        }
+
+    # Same tool call AMMA would make for this request
+    return {**turn, "messages": [AIMessage(
+        content="",
+        name=FAST_PATH_MESSAGE_NAME,
+        tool_calls=[{
+            "name": "request_new_story",
+            "args": {"story_theme": intent.story_theme},
+            "id": f"call_{uuid4().hex}",
+        }],
+    )]}
+
+
 async def amma(state: State, runtime: Runtime[Context]) -> Dict[str, List[AIMessage]]:
     """AMMA - conversational agent that collects preferences and handles conversation."""
     context = runtime.context if runtime.context else Context()
-    model = load_chat_model(context.model).bind_tools(TOOLS)
-
-    system_message = AMMA_PROMPT.format(
-        child_name=state.child_name or "None",
-        story_theme=state.story_theme or "None",
-        generated_story=state.generated_story or "None",
-        suggested_revisions=state.suggested_revisions or "None",
-        system_time=datetime.now(tz=UTC).isoformat()
-    )
+    system_message = AMMA_TEMPLATE.render(state)
+
+    # Keep the history within budget: old stories become references and older
+    # turns are summarized into the system prompt
+    history = compact_history(state.messages, state.generated_story, context.history_token_budget)
+    if history.summary:
+        system_message += f"\n\nEARLIER CONVERSATION (summarized)\n{history.summary}"
 
-    response = cast(AIMessage, await model.ainvoke([
+    # AMMA's tokens stream to the child, so its calls are never hedged
+    response, model_name = await call_model(context, "amma", [
         {"role": "system", "content": system_message}, 
-        *state.messages
-    ]))
+        *history.messages
+    ], tools=TOOLS, hedge=False)
+    record_llm_usage("amma", response, model_name)
 
     # Handle last step gracefully
     if state.is_last_step and response.tool_calls:
-        model_without_tools = load_chat_model(context.model)
-        response = cast(AIMessage, await model_without_tools.ainvoke([
+        response, model_name = await call_model(context, "amma", [
             {"role": "system", "content": system_message + "\n\nRespond naturally without using tools."},
-            *state.messages
-        ]))
+            *history.messages
+        ], hedge=False)
+        record_llm_usage("amma", response, model_name)
 
     return {"messages": [response]}
 
 
+def _story_cache_key(state: State, context: Context) -> str:
+    # A revision depends on the story being revised, so that is part of the key
+    creator_model, _ = context.model_settings("creator")
+    return story_key(state.story_theme, state.suggested_revisions, creator_model, state.generated_story)
+
+
+async def story_cache_lookup(state: State, runtime: Runtime[Context]) -> Dict[str, Any]:
+    """Serve an approved story from the story cache, skipping creation and evaluation."""
+    if story_cache is None:
+        return {}
+    context = runtime.context if runtime.context else Context()
+    cached = story_cache.get(_story_cache_key(state, context))
+    if cached is None:
+        return {}
+    return {"current_story": personalize(cached, state.child_name), "story_from_cache": True}
+
+
+async def _patch_story(state: State, context: Context) -> Optional[str]:
+    """Revises the told story by rewriting only the paragraphs the revision touches.
+
+    Returns None if the model's patch cannot be applied.
+    """
+    paragraphs = split_paragraphs(state.generated_story or "")
+
+    system_message = STORY_REVISION_TEMPLATE.render(
+        state, numbered_story=number_paragraphs(paragraphs)
+    )
+
+    response, model_name = await call_model(
+        context, "creator", [{"role": "system", "content": system_message}],
+        tools=[StoryPatch], tool_choice="StoryPatch"
+    )
+    record_llm_usage("story_creator", response, model_name)
+    if not response.tool_calls:
+        return None
+    try:
+        return apply_patch(paragraphs, StoryPatch.model_validate(response.tool_calls[0]["args"]))
+    except ValueError:
+        return None
+
+
 async def story_creator(state: State, runtime: Runtime[Context]) -> Dict[str, Any]:
     """Creates personalized bedtime stories or revisions based on state."""
     context = runtime.context if runtime.context else Context()
-    model = load_chat_model(context.model)
+
+    # A child's revision of the told story: patch it instead of rewriting it
+    # (editor-requested rewrites of a patched story fall through to a full one)
+    is_revision = bool(state.generated_story and state.suggested_revisions)
+    if is_revision and context.patch_revisions and not state.revision_instructions:
+        revised = await _patch_story(state, context)
+        increment(REVISION_MODES, mode="patch" if revised is not None else "patch_failed")
+        if revised is not None:
+            return {
+                "messages": [AIMessage(content=revised)],
+                "current_story": revised,
+                "draft_stories": []
+            }
+    elif is_revision:
+        increment(REVISION_MODES, mode="full")
+
+    _, model_kwargs = context.model_settings("creator")
     
-    system_message = STORY_CREATOR_PROMPT.format(
-        child_name=state.child_name or "little one",
-        child_age="5-10 years old",
-        story_theme=state.story_theme or "magical adventure",
-        generated_story=state.generated_story or "",
-        suggested_revisions=state.suggested_revisions or "",
-        system_time=datetime.now(tz=UTC).isoformat()
-    )
+    system_message = STORY_CREATOR_TEMPLATE.render(state)
     
-    # Include editor feedback if available
+    # Include the editor's instructions after a rejected draft
     messages = [{"role": "system", "content": system_message}]
-    if state.messages:
-        for msg in state.messages[-3:]:
-            if hasattr(msg, 'content') and "NEEDS_REVISION" in str(msg.content):
-                messages.append({"role": "user", "content": f"Revise based on: {msg.content}"})
-                break
+    if state.revision_instructions:
+        messages.append({
+            "role": "user",
+            "content": "The editor rejected the previous draft. Write the story again, "
+            "fixing these points:\n" + format_instructions(state.revision_instructions)
+        })
+
+    # A full story plus its evaluation would overrun the turn: ask for a short one
+    degradations = state.degradations
+    shortened = SHORTENED_STORY in degradations or not can_afford(
+        state.turn_deadline, "story_creator", "story_evaluator"
+    )
+    if shortened:
+        degradations = degrade(degradations, SHORTENED_STORY)
+        messages.append({
+            "role": "user",
+            "content": f"Time is short tonight: keep the story complete but brief, about "
+            f"{SHORT_STORY_MINUTES} minutes read aloud "
+            f"({SHORT_STORY_MINUTES * READ_ALOUD_WPM} words)."
+        })
     
-    response = cast(AIMessage, await model.ainvoke(messages))
+    drafts = max(1, context.story_drafts)
+
+    async def generate() -> List[str]:
+        # Speculative drafts: N stories at once, the evaluator picks one;
+        # drafts can stream to the child, so they are not hedged
+        results = await asyncio.gather(
+            *(call_model(context, "creator", messages, hedge=False) for _ in range(drafts))
+        )
+        responses = []
+        for response, model_name in results:
+            record_llm_usage("story_creator", response, model_name)
+            responses.append(response)
+        return [depersonalize(str(r.content), state.child_name) for r in responses]
+
+    if context.coalesce_stories:
+        # Identical requests in flight share one generation, then get their own name
+        key = "\x1f".join([
+            _story_cache_key(state, context),
+            repr(sorted(model_kwargs.items())),
+            format_instructions(state.revision_instructions),
+            str(drafts),
+            str(shortened),
+        ])
+        stories, coalesced = await story_flights.do(key, generate)
+        if coalesced:
+            increment(COALESCED_CALLS, node="story_creator")
+    else:
+        stories = await generate()
+    stories = [personalize(story, state.child_name) for story in stories]
     return {
-        "messages": [response],
-        "current_story": response.content  # Store current story for evaluation
+        "messages": [AIMessage(content=stories[0])],
+        "current_story": stories[0],  # Store current story for evaluation
+        "draft_stories": stories if len(stories) > 1 else [],
+        "degradations": degradations
     }
 
 
+async def _evaluate_story(
+    state: State, context: Context, story: str, use_editor: bool = True
+) -> Tuple[StoryVerdict, str]:
+    """Evaluate one story; return the verdict and who gave it.
+
+    The source is 'local' or 'editor', 'skipped' when the editor was needed
+    but ``use_editor`` is off because the turn is out of time, or 'unverified'
+    when the editor's reply held no usable verdict.
+    """
+    # A shortened story is held to the length it was asked for
+    minutes = (
+        (SHORT_STORY_MINUTES, TARGET_MINUTES[1])
+        if SHORTENED_STORY in state.degradations
+        else TARGET_MINUTES
+    )
+
+    # Clear passes and clear failures are decided locally, for free
+    if context.local_evaluation:
+        verdict = pre_evaluate(story, state.story_theme, target_minutes=minutes)
+        if verdict is not None:
+            return verdict, "local"
+
+    if not use_editor:
+        # No clear local failure and no time to ask: tell the story as it is
+        return StoryVerdict(approved=True, score=8), "skipped"
+
+    # The verdict comes back as a forced tool call, which works across providers
+    system_message = STORY_EDITOR_TEMPLATE.render(state, generated_story=story)
+
+    async def judge() -> Optional[StoryVerdict]:
+        response, served_by = await call_model(
+            context, "evaluator", [{"role": "system", "content": system_message}],
+            tools=[StoryVerdict], tool_choice="StoryVerdict"
+        )
+        record_llm_usage("story_evaluator", response, served_by)
+        if not response.tool_calls:
+            increment(INVALID_VERDICTS, reason="no_verdict")
+            return None
+        try:
+            return StoryVerdict.model_validate(response.tool_calls[0]["args"])
+        except ValueError:
+            # e.g. arguments cut off at the token limit or missing the score
+            increment(INVALID_VERDICTS, reason="invalid")
+            return None
+
+    if not context.coalesce_stories:
+        verdict = await judge()
+    else:
+        verdict = await _coalesced_judge(state, context, story, judge)
+    if verdict is not None:
+        return verdict, "editor"
+
+    # A finished story is not thrown away over a malformed verdict: the local
+    # rules decide if they can, otherwise it is told with a cautious score
+    if not context.local_evaluation:
+        verdict = pre_evaluate(story, state.story_theme, target_minutes=minutes)
+        if verdict is not None:
+            return verdict, "local"
+    return StoryVerdict(approved=True, score=6), "unverified"
+
+
+async def _coalesced_judge(
+    state: State,
+    context: Context,
+    story: str,
+    judge: Callable[[], Awaitable[Optional[StoryVerdict]]],
+) -> Optional[StoryVerdict]:
+    """Run the editor once for identical stories evaluated at the same time."""
+    model_name, model_kwargs = context.model_settings("evaluator")
+    # Coalesced stories differ only in the child's name, so they share a verdict
+    key = "\x1f".join([
+        "editor",
+        model_name,
+        repr(sorted(model_kwargs.items())),
+        normalize(state.story_theme),
+        normalize(state.suggested_revisions),
+        depersonalize(story, state.child_name),
+    ])
+    verdict, coalesced = await story_flights.do(key, judge)
+    if coalesced:
+        increment(COALESCED_CALLS, node="story_evaluator")
+    return verdict
+
+
+async def _select_draft(
+    state: State, context: Context, drafts: List[str], use_editor: bool = True
+) -> Tuple[str, StoryVerdict, str]:
+    """Evaluate drafts concurrently; return the first approved or the best-scored one."""
+    async def judge(draft: str) -> Tuple[str, StoryVerdict, str]:
+        return (draft, *await _evaluate_story(state, context, draft, use_editor))
+
+    tasks = [asyncio.ensure_future(judge(draft)) for draft in drafts]
+    rejected: List[Tuple[str, StoryVerdict, str]] = []
+    try:
+        for finished in asyncio.as_completed(tasks):
+            try:
+                result = await finished
+            except Exception:
+                # One failed evaluation must not sink the other drafts
+                continue
+            if result[1].approved:
+                return result
+            rejected.append(result)
+    finally:
+        # The remaining evaluations are no longer needed
+        for task in tasks:
+            task.cancel()
+    if not rejected:
+        raise RuntimeError("All story draft evaluations failed")
+    return max(rejected, key=lambda result: result[1].score)
+
+
 async def story_evaluator(state: State, runtime: Runtime[Context]) -> Dict[str, Any]:
     """Evaluates story quality and returns structured decision."""
     context = runtime.context if runtime.context else Context()
-    model = load_chat_model(context.model)
     
     # Get the story to evaluate
     current_story = state.current_story or ""
     if not current_story and state.messages:
         current_story = state.messages[-1].content
-    
-    system_message = STORY_EDITOR_PROMPT.format(
-        story_theme=state.story_theme or "magical adventure",
-        generated_story=current_story,
-        suggested_revisions=state.suggested_revisions or "None",
-        system_time=datetime.now(tz=UTC).isoformat()
-    )
-    
-    response = cast(AIMessage, await model.ainvoke([
-        {"role": "system", "content": system_message}
-    ]))
-    
-    # Determine if approved based on response
-    is_approved = "approved" in response.content.lower()
+
+    # Near the deadline only the free local checks run
+    use_editor = can_afford(state.turn_deadline, "story_evaluator")
+    if len(state.draft_stories) > 1:
+        current_story, verdict, source = await _select_draft(
+            state, context, state.draft_stories, use_editor
+        )
+    else:
+        verdict, source = await _evaluate_story(state, context, current_story, use_editor)
+
+    degradations = state.degradations
+    if source == "skipped":
+        degradations = degrade(degradations, SKIPPED_EVALUATION)
+    elif not verdict.approved and state.revision_count < 3 and not can_afford(
+        state.turn_deadline, "story_creator", "story_evaluator"
+    ):
+        # Another revision round would overrun the turn: the best story so far is told
+        degradations = degrade(degradations, SKIPPED_REVISION)
     
     return {
         # Don't add evaluation messages to conversation history - keep them internal
-        "evaluation_result": "approved" if is_approved else "needs_revision",
+        "evaluation_result": "approved" if verdict.approved else "needs_revision",
         "current_story": current_story,  # Pass story along
-        "evaluation_feedback": response.content
+        "evaluation_feedback": format_instructions(verdict.revision_instructions) or None,
+        "evaluation_score": verdict.score,
+        "evaluation_source": source,
+        "revision_instructions": [] if verdict.approved else verdict.revision_instructions,
+        "draft_stories": [],
+        "degradations": degradations
     }
 
 
 async def story_presenter(state: State, runtime: Runtime[Context]) -> Dict[str, Any]:
-    """Presents the final approved story to the user."""
+    """Presents the final approved story to the user.
+
+    With optimistic presentation a fresh story arrives here before its
+    evaluation: it is shown provisionally and sent on to the evaluator. Once
+    the verdict is in, an approved story is only finalized, and a revised one
+    replaces the provisional message.
+    """
     current_story = state.current_story or ""
+
+    if state.evaluation_result is None and not state.story_from_cache:
+        # Shown now, judged next; the story is finalized after the verdict
+        message_id = str(uuid4())
+        return {
+            "messages": [AIMessage(content=current_story, name=STORY_MESSAGE_NAME, id=message_id)],
+            "provisional_message_id": message_id,
+        }
+
+    observe(STORY_REVISIONS, state.revision_count)
+
+    # Only stories actually judged and approved are worth serving again; one
+    # shortened or waved through under a tight budget is not
+    if (
+        story_cache is not None
+        and state.evaluation_result == "approved"
+        and state.evaluation_source in ("local", "editor")
+        and not state.degradations
+        and not state.story_from_cache
+    ):
+        context = runtime.context if runtime.context else Context()
+        story_cache.put(
+            _story_cache_key(state, context), depersonalize(current_story, state.child_name)
+        )
     
-    # Simple, clean presentation of just the story
-    final_message = AIMessage(content=current_story)
+    if state.provisional_message_id is None:
+        # Simple, clean presentation of just the story
+        messages = [AIMessage(content=current_story, name=STORY_MESSAGE_NAME)]
+    elif state.revision_count == 0:
+        # The provisional story was approved as shown
+        increment(OPTIMISTIC_STORIES, outcome="confirmed")
+        messages = []
+    else:
+        # The editor rejected it: the revised story takes its place
+        increment(OPTIMISTIC_STORIES, outcome="corrected")
+        messages = [
+            RemoveMessage(id=state.provisional_message_id),
+            AIMessage(content=current_story, name=STORY_MESSAGE_NAME),
+        ]
     
     return {
-        "messages": [final_message],
+        "messages": messages,
         "generated_story": current_story,
         "suggested_revisions": None,  # Clear revisions after successful presentation
         "evaluation_result": None,  # Clear evaluation result
         "evaluation_feedback": None,  # Clear evaluation feedback
+        "evaluation_score": None,
+        "evaluation_source": None,
+        "revision_instructions": [],
         "current_story": None,  # Clear current story
-        "revision_count": 0  # Reset revision count for next story
+        "revision_count": 0,  # Reset revision count for next story
+        "story_from_cache": False,
+        "provisional_message_id": None
     }
 
 
@@ -132,7 +489,7 @@ async def revision_handler(state: State, runtime: Runtime[Context]) -> Dict[str,
         "revision_count": state.revision_count + 1,
         "evaluation_result": None,
         "current_story": None,  # Clear current story so creator generates new one
-        # Keep suggested_revisions for the story_creator to see
+        # Keep suggested_revisions and revision_instructions for the story_creator to see
     }
 
 
@@ -184,7 +541,11 @@ async def handle_tools(state: State, runtime: Runtime[Context]) -> Dict[str, Any
             state_updates['current_story'] = None
             state_updates['evaluation_result'] = None
             state_updates['evaluation_feedback'] = None
+            state_updates['evaluation_score'] = None
+            state_updates['evaluation_source'] = None
+            state_updates['revision_instructions'] = []
             state_updates['revision_count'] = 0
+            state_updates['provisional_message_id'] = None
             
             # Create tool message
             tool_messages.append(ToolMessage(
@@ -199,7 +560,7 @@ async def handle_tools(state: State, runtime: Runtime[Context]) -> Dict[str, Any
 # ROUTING LOGIC
 # ============================================================================
 
-def route_from_amma(state: State) -> Literal["__end__", "tools", "story_creator"]:
+def route_from_amma(state: State) -> Literal["__end__", "tools", "story_cache"]:
     """Routes from AMMA based on output and conversation context."""
     last_message = state.messages[-1]
     
@@ -224,16 +585,15 @@ def route_from_amma(state: State) -> Literal["__end__", "tools", "story_creator"
     
     # 1. If we have suggested revisions, create revised story
     if state.suggested_revisions and state.generated_story:
-        return "story_creator"
+        return "story_cache"
     
     # 2. If we have preferences but no story yet, create new story
     if (state.child_name or state.story_theme) and not state.generated_story:
-        return "story_creator"
+        return "story_cache"
     
     # 3. Check if user is indicating they want to end (natural bedtime cues)
     if user_message:
-        natural_endings = ["good night", "goodnight", "bye", "goodbye", "sleep", "tired", "bedtime"]
-        if any(ending in user_message for ending in natural_endings):
+        if any(ending in user_message for ending in NATURAL_ENDINGS):
             # User wants to end - let AMMA respond with a gentle goodbye
             return "__end__"
     
@@ -248,14 +608,61 @@ def route_from_amma(state: State) -> Literal["__end__", "tools", "story_creator"
     return "__end__"
 
 
+def route_from_fast_path(state: State) -> Literal["amma", "tools", "__end__"]:
+    """Routes fast-path answers past AMMA; everything else goes to AMMA."""
+    last_message = state.messages[-1]
+    if isinstance(last_message, AIMessage) and last_message.name == FAST_PATH_MESSAGE_NAME:
+        return "tools" if last_message.tool_calls else "__end__"
+    return "amma"
+
+
+def route_from_tools(state: State) -> Literal["amma", "story_cache"]:
+    """Routes fast-path tool calls straight to story creation."""
+    for msg in reversed(state.messages):
+        if isinstance(msg, AIMessage):
+            return "story_cache" if msg.name == FAST_PATH_MESSAGE_NAME else "amma"
+    return "amma"
+
+
+def route_from_story_cache(state: State) -> Literal["story_presenter", "story_creator"]:
+    """Routes cached stories straight to presentation."""
+    return "story_presenter" if state.story_from_cache else "story_creator"
+
+
+def route_from_creator(
+    state: State, runtime: Runtime[Context]
+) -> Literal["story_evaluator", "story_presenter"]:
+    """Routes a fresh single draft straight to presentation in optimistic mode."""
+    context = runtime.context if runtime.context else Context()
+    optimistic = (
+        context.optimistic_presentation
+        and state.revision_count == 0
+        and state.provisional_message_id is None
+        and not state.draft_stories  # Several drafts need the evaluator to pick one
+    )
+    return "story_presenter" if optimistic else "story_evaluator"
+
+
+def route_from_presenter(state: State) -> Literal["story_evaluator", "__end__"]:
+    """Send a provisionally presented story on to evaluation."""
+    if state.provisional_message_id is not None and state.evaluation_result is None:
+        return "story_evaluator"
+    return "__end__"
+
+
 def route_from_evaluator(state: State) -> Literal["story_presenter", "revision_handler"]:
     """Routes based on story evaluation result."""
     evaluation_result = state.evaluation_result or 'needs_revision'
     revision_count = state.revision_count
+
+    # Count which path decided, to measure how many editor calls are avoided
+    increment(EVALUATIONS, source=state.evaluation_source or "editor", result=evaluation_result)
     
-    # If approved or max revisions reached, present the story
+    # If approved, max revisions reached or out of time, present the story
     if evaluation_result == "approved" or revision_count >= 3:
         return "story_presenter"
+    if SKIPPED_REVISION in state.degradations:
+        return "story_presenter"
     
     # Otherwise, handle revision
     return "revision_handler"
@@ -268,24 +675,37 @@ def route_from_evaluator(state: State) -> Literal["story_presenter", "revision_h
 # Build the graph
 builder = StateGraph(State, input_schema=InputState, context_schema=Context)
 
-# Add nodes
-builder.add_node("amma", amma)
-builder.add_node("tools", handle_tools)
-builder.add_node("story_creator", story_creator)
-builder.add_node("story_evaluator", story_evaluator)
-builder.add_node("story_presenter", story_presenter)
-builder.add_node("revision_handler", revision_handler)
+# Add nodes (timed; see src.amma.metrics)
+builder.add_node("fast_path", instrument_node("fast_path", fast_path))
+builder.add_node("amma", instrument_node("amma", amma))
+builder.add_node("tools", instrument_node("tools", handle_tools))
+builder.add_node("story_cache", instrument_node("story_cache", story_cache_lookup))
+builder.add_node("story_creator", instrument_node("story_creator", story_creator))
+builder.add_node("story_evaluator", instrument_node("story_evaluator", story_evaluator))
+builder.add_node("story_presenter", instrument_node("story_presenter", story_presenter))
+builder.add_node("revision_handler", instrument_node("revision_handler", revision_handler))
 
 # Add edges
-builder.add_edge("__start__", "amma")
-builder.add_edge("tools", "amma")
-builder.add_edge("story_creator", "story_evaluator")
+builder.add_edge("__start__", "fast_path")
 builder.add_edge("revision_handler", "story_creator")  # Revision loop
-builder.add_edge("story_presenter", "__end__")
 
 # Add conditional edges
+builder.add_conditional_edges("fast_path", route_from_fast_path)
+builder.add_conditional_edges("tools", route_from_tools)
 builder.add_conditional_edges("amma", route_from_amma)
+builder.add_conditional_edges("story_cache", route_from_story_cache)
+builder.add_conditional_edges("story_creator", route_from_creator)
+builder.add_conditional_edges("story_presenter", route_from_presenter)
 builder.add_conditional_edges("story_evaluator", route_from_evaluator)
 
+def compile_graph(checkpointer: Optional[BaseCheckpointSaver] = None) -> CompiledStateGraph:
+    """Compile the AMMA graph.
+
+    With a checkpointer, state is persisted per ``thread_id`` so each turn only
+    needs to send the new message.
+    """
+    return builder.compile(name="AMMA - Bedtime Story Agent", checkpointer=checkpointer)
+
+
 # Compile
-graph = builder.compile(name="AMMA - Bedtime Story Agent")
\ No newline at end of file
+graph = compile_graph()
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""Pool of pre-generated greetings for new sessions.
+
+Greeting a new session used to cost a full ``amma`` model call with an almost
+identical prompt every time. The pool generates a handful of greetings up
+front, hands one out instantly per connection, and slowly replaces them in the
+background so children still hear some variety.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.amma.context import Context
+from src.amma.graph import graph
+
+logger = logging.getLogger(__name__)
+
+# The synthetic user turn recorded before a pooled greeting
+GREETING_TRIGGER = "hey"
+
+
+async def generate_greeting(context: Optional[Context] = None) -> Optional[str]:
+    """Run one stateless ``amma`` turn for the greeting trigger.
+
+    Returns None if the model did not answer with plain text.
+    """
+    result = await graph.ainvoke(
+        {"messages": [HumanMessage(content=GREETING_TRIGGER)]},
+        context=context or Context(),
+    )
+    last_message = result["messages"][-1]
+    if not isinstance(last_message, AIMessage) or last_message.tool_calls:
+        return None
+    content = last_message.content
+    return content if isinstance(content, str) and content.strip() else None
+
+
+class GreetingPool:
+    """A small, slowly refreshed set of ready-made greetings."""
+
+    def __init__(
+        self,
+        size: int = 5,
+        refresh_interval: float = 15 * 60,
+        generate: Callable[[], Awaitable[Optional[str]]] = generate_greeting,
+    ):
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self._generate = generate
+        self._greetings: List[str] = []
+        self._counters = {"served": 0, "empty": 0, "generated": 0, "failed": 0}
+
+    async def _generate_one(self) -> Optional[str]:
+        try:
+            greeting = await self._generate()
+        except Exception:
+            logger.exception("Greeting generation failed")
+            greeting = None
+        self._counters["generated" if greeting else "failed"] += 1
+        return greeting
+
+    async def fill(self) -> None:
+        """Generate greetings until the pool is full."""
+        missing = self.size - len(self._greetings)
+        if missing <= 0:
+            return
+        results = await asyncio.gather(*(self._generate_one() for _ in range(missing)))
+        self._greetings.extend(g for g in results if g)
+
+    async def refresh(self) -> None:
+        """Replace the oldest greeting with a freshly generated one."""
+        greeting = await self._generate_one()
+        if greeting:
+            if len(self._greetings) >= self.size:
+                self._greetings.pop(0)
+            self._greetings.append(greeting)
+
+    async def run(self) -> None:
+        """Fill the pool, then keep refreshing it until cancelled."""
+        await self.fill()
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            # Top up after failures, otherwise rotate one greeting
+            if len(self._greetings) < self.size:
+                await self.fill()
+            else:
+                await self.refresh()
+
+    def take(self) -> Optional[str]:
+        """Return a random pooled greeting, or None if the pool is empty."""
+        if not self._greetings:
+            self._counters["empty"] += 1
+            return None
+        self._counters["served"] += 1
+        return random.choice(self._greetings)
+
+    def stats(self) -> Dict[str, int]:
+        """Return pool size and served/generated counters."""
+        return {**self._counters, "pooled": len(self._greetings)}
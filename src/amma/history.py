@@ -0,0 +1,147 @@
+"""Conversation history compaction for the AMMA node.
+
+Long sessions accumulate several full story texts and tool exchanges. Before
+each ``amma`` call the history is compacted to a token budget: stories become
+short references (the current one is already in the system prompt) and, if
+that is not enough, older turns are folded into a brief local summary.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+logger = logging.getLogger(__name__)
+
+# Name set on the AIMessage emitted by story_presenter
+STORY_MESSAGE_NAME = "story_presenter"
+
+# AI replies without tool calls longer than this are treated as stories (for
+# threads created before presenter messages were named)
+_STORY_MIN_CHARS = 1500
+
+# Limits that keep the summary itself small
+_SUMMARY_MAX_ITEMS = 8
+_SUMMARY_ITEM_CHARS = 160
+_SUMMARY_MAX_TOKENS = _SUMMARY_MAX_ITEMS * _SUMMARY_ITEM_CHARS // 4
+
+_FIRST_SENTENCE_RE = re.compile(r"\s*(.+?[.!?])(?:\s|$)", re.DOTALL)
+
+compaction_stats: Dict[str, int] = {
+    "calls": 0,
+    "compacted": 0,
+    "tokens_before": 0,
+    "tokens_after": 0,
+}
+
+
+class CompactedHistory(NamedTuple):
+    """Result of compacting a conversation history."""
+
+    messages: List[AnyMessage]
+    summary: Optional[str]
+    tokens_before: int
+    tokens_after: int
+
+
+def _text(message: AnyMessage) -> str:
+    content = message.content
+    return content if isinstance(content, str) else str(content)
+
+
+def is_story_message(message: AnyMessage) -> bool:
+    """Return whether a message carries a full story text."""
+    if not isinstance(message, AIMessage) or message.tool_calls:
+        return False
+    return message.name == STORY_MESSAGE_NAME or len(_text(message)) > _STORY_MIN_CHARS
+
+
+def _shorten(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def story_reference(message: AnyMessage, current_story: Optional[str]) -> AIMessage:
+    """Replace a story message with a short reference to it."""
+    text = _text(message)
+    if current_story and text.strip() == current_story.strip():
+        content = "[Told the current story - its full text is in 'Existing story' above.]"
+    else:
+        match = _FIRST_SENTENCE_RE.match(text)
+        opening = _shorten(match.group(1) if match else text, _SUMMARY_ITEM_CHARS)
+        content = f'[Told an earlier story that began: "{opening}"]'
+    return AIMessage(content=content, name=message.name, id=message.id)
+
+
+def summarize_messages(messages: Sequence[AnyMessage]) -> Optional[str]:
+    """Summarize dropped turns locally, without a model call."""
+    requests = [
+        _shorten(_text(m), _SUMMARY_ITEM_CHARS)
+        for m in messages
+        if isinstance(m, HumanMessage) and _text(m).strip()
+    ]
+    stories = sum(1 for m in messages if is_story_message(m) or _text(m).startswith("[Told "))
+    if not requests and not stories:
+        return None
+
+    parts = []
+    if requests:
+        recent = requests[-_SUMMARY_MAX_ITEMS:]
+        skipped = len(requests) - len(recent)
+        said = "; ".join(f'"{r}"' for r in recent)
+        parts.append(
+            f"Earlier the child said: {said}"
+            + (f" (and {skipped} earlier messages)" if skipped else "")
+            + "."
+        )
+    if stories:
+        parts.append(f"AMMA already told {stories} {'story' if stories == 1 else 'stories'}.")
+    return " ".join(parts)
+
+
+def compact_history(
+    messages: Sequence[AnyMessage], current_story: Optional[str], budget: int
+) -> CompactedHistory:
+    """Compact a conversation history to roughly ``budget`` tokens.
+
+    Args:
+        messages: The full conversation history.
+        current_story: The story already included in the system prompt.
+        budget: Approximate token budget; 0 disables compaction.
+    """
+    before = count_tokens_approximately(messages)
+    compaction_stats["calls"] += 1
+    compaction_stats["tokens_before"] += before
+    if budget <= 0 or before <= budget:
+        compaction_stats["tokens_after"] += before
+        return CompactedHistory(list(messages), None, before, before)
+
+    # 1. Stories become short references
+    compacted: List[AnyMessage] = [
+        story_reference(m, current_story) if is_story_message(m) else m for m in messages
+    ]
+    summary = None
+    after = count_tokens_approximately(compacted)
+
+    # 2. Keep the most recent turns that fit and summarize the rest. Cuts are
+    # made at user messages so tool calls always stay next to their results.
+    if after > budget:
+        window_budget = max(budget - _SUMMARY_MAX_TOKENS, budget // 2)
+        boundaries = [i for i, m in enumerate(compacted) if isinstance(m, HumanMessage)]
+        start = boundaries[-1] if boundaries else 0
+        for boundary in boundaries:
+            if count_tokens_approximately(compacted[boundary:]) <= window_budget:
+                start = boundary
+                break
+        summary = summarize_messages(compacted[:start])
+        compacted = compacted[start:]
+        after = count_tokens_approximately(compacted) + (len(summary) // 4 if summary else 0)
+
+    compaction_stats["compacted"] += 1
+    compaction_stats["tokens_after"] += after
+    logger.info("Compacted history from %d to %d tokens", before, after)
+    return CompactedHistory(compacted, summary, before, after)
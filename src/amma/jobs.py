@@ -0,0 +1,340 @@
+"""Background turns and the per-session event log that makes them resumable.
+
+A story turn can run for tens of seconds, long enough for a tablet to drop its
+WebSocket. Turns therefore run as background jobs that do not depend on the
+socket, and every frame sent to a session is first appended to its event log
+under an increasing offset. A client that reconnects with the last offset it
+received gets the frames it missed replayed, without re-running the graph.
+
+A session's log expires after a while, and a new one starts again at offset 1.
+Each log therefore has an ``epoch``, sent with every frame: a client that sees
+a new epoch starts counting afresh instead of discarding the new frames as
+already seen.
+
+``InMemoryEventLog`` serves a single worker; ``SQLiteEventLog`` shares the log
+between workers so a client can reconnect to any of them. Its queries run in a
+worker thread, so a database locked by another worker never stalls the event
+loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Job states; "busy" means the turn was turned away for lack of a run slot
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+JOB_BUSY = "busy"
+
+
+def new_epoch() -> str:
+    """Return an id for a session log that is starting."""
+    return uuid.uuid4().hex[:12]
+
+
+def new_job(session_id: str) -> Dict[str, Any]:
+    """Create the record of a job that is about to start."""
+    return {
+        "job_id": uuid.uuid4().hex,
+        "session_id": session_id,
+        "status": JOB_RUNNING,
+        "created_at": time.time(),
+        "finished_at": None,
+    }
+
+
+class EventLog(ABC):
+    """Interface for per-session frame buffers and job records."""
+
+    @abstractmethod
+    async def append(self, session_id: str, frame: Dict[str, Any]) -> Dict[str, Any]:
+        """Buffer a frame and return it as buffered.
+
+        The returned frame carries its ``offset`` (1, 2, ... per log) and the
+        log's ``epoch``.
+        """
+
+    @abstractmethod
+    async def read(
+        self, session_id: str, after: int = 0, epoch: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Return buffered frames with an offset above ``after``, oldest first.
+
+        Each frame carries its ``offset`` and ``epoch``. An ``epoch`` other
+        than the log's means ``after`` counts frames of an expired log, so all
+        buffered frames are returned.
+        """
+
+    @abstractmethod
+    async def drop(self, session_id: str) -> None:
+        """Forget a session's frames."""
+
+    @abstractmethod
+    async def put_job(self, job: Dict[str, Any]) -> None:
+        """Create or update a job record."""
+
+    @abstractmethod
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job record, or None if unknown or expired."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Return buffer and job counters."""
+
+
+class InMemoryEventLog(EventLog):
+    """Event log in process memory.
+
+    Each session keeps its last ``max_events`` frames; sessions idle for
+    longer than ``ttl_seconds`` are dropped, and at most ``max_jobs`` job
+    records are kept.
+    """
+
+    def __init__(self, max_events: int = 1000, ttl_seconds: float = 30 * 60, max_jobs: int = 1000):
+        self.max_events = max_events
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        # session_id -> (frames, last offset, epoch); ordered by last append
+        self._sessions: OrderedDict[str, Tuple[Deque[Dict[str, Any]], int, str]] = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._jobs: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"appended": 0, "replayed": 0, "expired": 0}
+
+    def _expire(self, now: float) -> None:
+        while self._sessions:
+            session_id = next(iter(self._sessions))
+            if now - self._touched[session_id] < self.ttl_seconds:
+                break
+            del self._sessions[session_id], self._touched[session_id]
+            self._counters["expired"] += 1
+
+    async def append(self, session_id: str, frame: Dict[str, Any]) -> Dict[str, Any]:
+        """Buffer a frame, dropping the session's oldest beyond ``max_events``."""
+        now = time.monotonic()
+        with self._lock:
+            # Expire first, so a log idle past the TTL starts a new epoch
+            self._expire(now)
+            frames, offset, epoch = self._sessions.pop(
+                session_id, (deque(maxlen=self.max_events), 0, new_epoch())
+            )
+            offset += 1
+            buffered = {**frame, "offset": offset, "epoch": epoch}
+            frames.append(buffered)
+            self._sessions[session_id] = (frames, offset, epoch)
+            self._touched[session_id] = now
+            self._counters["appended"] += 1
+        return buffered
+
+    async def read(
+        self, session_id: str, after: int = 0, epoch: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Return the session's buffered frames after ``after``."""
+        with self._lock:
+            frames, _, current = self._sessions.get(session_id, ((), 0, None))
+            if epoch is not None and epoch != current:
+                after = 0
+            missed = [frame for frame in frames if frame["offset"] > after]
+            self._counters["replayed"] += len(missed)
+        return missed
+
+    async def drop(self, session_id: str) -> None:
+        """Forget a session's frames."""
+        with self._lock:
+            if self._sessions.pop(session_id, None) is not None:
+                del self._touched[session_id]
+
+    async def put_job(self, job: Dict[str, Any]) -> None:
+        """Create or update a job record."""
+        with self._lock:
+            self._jobs[job["job_id"]] = dict(job)
+            self._jobs.move_to_end(job["job_id"])
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job record."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def stats(self) -> Dict[str, int]:
+        """Return buffer and job counters."""
+        with self._lock:
+            return {
+                **self._counters,
+                "sessions": len(self._sessions),
+                "frames": sum(len(frames) for frames, _, _ in self._sessions.values()),
+                "jobs": len(self._jobs),
+            }
+
+
+class SQLiteEventLog(EventLog):
+    """Event log in a SQLite file shared by all workers.
+
+    Frames older than ``ttl_seconds`` and frames beyond a session's last
+    ``max_events`` are deleted lazily, as are job records past the TTL. Each
+    session's offset counter and epoch live in ``logs`` and expire with its
+    last frame.
+    """
+
+    def __init__(
+        self,
+        path: str = "amma_events.db",
+        max_events: int = 1000,
+        ttl_seconds: float = 30 * 60,
+    ):
+        self.path = path
+        self.max_events = max_events
+        self.ttl_seconds = ttl_seconds
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "session_id TEXT NOT NULL, offset INTEGER NOT NULL, payload TEXT NOT NULL, "
+            "created_at REAL NOT NULL, PRIMARY KEY (session_id, offset));"
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL);"
+            "CREATE TABLE IF NOT EXISTS logs ("
+            "session_id TEXT PRIMARY KEY, epoch TEXT NOT NULL, last_offset INTEGER NOT NULL, "
+            "updated_at REAL NOT NULL);"
+        )
+        self._lock = threading.Lock()
+        self._counters = {"appended": 0, "replayed": 0}
+        self._last_prune = time.monotonic()
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        self._conn.execute("DELETE FROM events WHERE created_at < ?", (cutoff,))
+        self._conn.execute("DELETE FROM jobs WHERE updated_at < ?", (cutoff,))
+        self._conn.execute("DELETE FROM logs WHERE updated_at < ?", (cutoff,))
+        self._last_prune = time.monotonic()
+
+    def _append(self, session_id: str, frame: Dict[str, Any]) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            # One statement, so concurrent writers never reuse an offset
+            epoch, offset = self._conn.execute(
+                "INSERT INTO logs (session_id, epoch, last_offset, updated_at) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET last_offset = last_offset + 1, "
+                "updated_at = excluded.updated_at RETURNING epoch, last_offset",
+                (session_id, new_epoch(), now),
+            ).fetchone()
+            # A new epoch overwrites any frames left over from an expired log
+            self._conn.execute(
+                "INSERT OR REPLACE INTO events (session_id, offset, payload, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (session_id, offset, json.dumps(frame), now),
+            )
+            if offset % self.max_events == 0:
+                self._conn.execute(
+                    "DELETE FROM events WHERE session_id = ? AND offset <= ?",
+                    (session_id, offset - self.max_events),
+                )
+            if time.monotonic() - self._last_prune >= 60:
+                self._prune()
+            self._counters["appended"] += 1
+        return {**frame, "offset": offset, "epoch": epoch}
+
+    def _read(
+        self, session_id: str, after: int = 0, epoch: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT epoch FROM logs WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return []
+            current = row[0]
+            if epoch is not None and epoch != current:
+                after = 0
+            rows = self._conn.execute(
+                "SELECT offset, payload FROM events WHERE session_id = ? AND offset > ? "
+                "ORDER BY offset",
+                (session_id, after),
+            ).fetchall()
+            self._counters["replayed"] += len(rows)
+        return [
+            {**json.loads(payload), "offset": offset, "epoch": current} for offset, payload in rows
+        ]
+
+    def _drop(self, session_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM events WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM logs WHERE session_id = ?", (session_id,))
+
+    def _put_job(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, data, updated_at) VALUES (?, ?, ?)",
+                (job["job_id"], json.dumps(job), time.time()),
+            )
+
+    def _get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    async def append(self, session_id: str, frame: Dict[str, Any]) -> Dict[str, Any]:
+        """Buffer a frame under the session's next offset."""
+        return await asyncio.to_thread(self._append, session_id, frame)
+
+    async def read(
+        self, session_id: str, after: int = 0, epoch: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Return the session's buffered frames after ``after``."""
+        return await asyncio.to_thread(self._read, session_id, after, epoch)
+
+    async def drop(self, session_id: str) -> None:
+        """Forget a session's frames."""
+        await asyncio.to_thread(self._drop, session_id)
+
+    async def put_job(self, job: Dict[str, Any]) -> None:
+        """Create or update a job record."""
+        await asyncio.to_thread(self._put_job, job)
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return a job record."""
+        return await asyncio.to_thread(self._get_job, job_id)
+
+    def stats(self) -> Dict[str, int]:
+        """Return buffer and job counters."""
+        with self._lock:
+            sessions, frames = self._conn.execute(
+                "SELECT COUNT(DISTINCT session_id), COUNT(*) FROM events"
+            ).fetchone()
+            jobs = self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        return {**self._counters, "sessions": sessions, "frames": frames, "jobs": jobs}
+
+
+def create_event_log() -> EventLog:
+    """Create the event log configured through environment variables.
+
+    ``AMMA_EVENT_LOG`` selects ``memory`` or ``sqlite``; it defaults to the
+    ``AMMA_BROKER`` backend, since workers that share a broker must share the
+    log too.
+    """
+    backend = os.getenv("AMMA_EVENT_LOG", os.getenv("AMMA_BROKER", "memory")).lower()
+    max_events = int(os.getenv("AMMA_EVENT_BUFFER", 1000))
+    ttl_seconds = float(os.getenv("AMMA_EVENT_TTL", 30 * 60))
+    if backend == "memory":
+        return InMemoryEventLog(max_events=max_events, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteEventLog(
+            path=os.getenv("AMMA_EVENT_DB", "amma_events.db"),
+            max_events=max_events,
+            ttl_seconds=ttl_seconds,
+        )
+    raise ValueError(f"Unknown event log: {backend}")
@@ -0,0 +1,294 @@
+"""Lightweight in-process metrics in the Prometheus text format.
+
+Node latencies, token usage, revision counts and errors are recorded into
+plain dicts, so recording costs a ``perf_counter`` call and a few dict updates
+and can stay on in production. ``render_metrics`` formats everything for the
+``/metrics`` endpoint. Set ``AMMA_METRICS=false`` to disable recording.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import time
+from bisect import bisect_left
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from langchain_core.messages import AIMessage
+
+METRICS_ENABLED = os.getenv("AMMA_METRICS", "true").lower() in ("1", "true", "yes", "on")
+
+# Seconds; covers a fast-path turn through a full revision loop
+LATENCY_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 4)
+
+Labels = Tuple[Tuple[str, str], ...]
+F = TypeVar("F", bound=Callable[..., Awaitable[Any]])
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Sequence[Tuple[str, str]] = ()) -> str:
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    # Full precision: "{:g}" would turn 1234570 tokens into 1.23457e+06
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        """Add ``amount`` to the series for ``labels``."""
+        key = _labels(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        """Return the Prometheus text lines for this counter."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in self.values.items()]
+        return lines
+
+
+class Histogram:
+    """Bucketed observations per label set."""
+
+    def __init__(self, name: str, description: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(buckets)
+        # Per label set: [count per bucket (+Inf last), sum, count]
+        self.values: Dict[Labels, List[Any]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record one observation for ``labels``."""
+        key = _labels(labels)
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> List[str]:
+        """Return the Prometheus text lines for this histogram."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        for key, (counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip([*self.buckets, "+Inf"], counts):
+                cumulative += bucket_count
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_format_labels(key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+NODE_LATENCY = Histogram("amma_node_latency_seconds", "Graph node run time.")
+NODE_ERRORS = Counter("amma_node_errors_total", "Graph node runs that raised.")
+TOKENS = Counter(
+    "amma_llm_tokens_total",
+    "LLM tokens by node, model and kind (prompt/cached_prompt/completion).",
+)
+LLM_CALLS = Counter("amma_llm_calls_total", "LLM calls by node and model.")
+LLM_FAILURES = Counter(
+    "amma_llm_failures_total",
+    "LLM calls that failed, by tier, model and reason (timeout/error/circuit_open).",
+)
+HEDGED_CALLS = Counter(
+    "amma_llm_hedged_total", "Hedged LLM requests by tier, model and outcome (sent/won)."
+)
+FAILOVERS = Counter("amma_llm_failovers_total", "LLM calls served by the fallback model, by tier.")
+STORY_REVISIONS = Histogram(
+    "amma_story_revisions", "Revision rounds before a story was presented.", COUNT_BUCKETS
+)
+REVISION_MODES = Counter(
+    "amma_story_revision_modes_total",
+    "Child revisions by mode: paragraph patch, full rewrite, or patch that fell back.",
+)
+EVALUATIONS = Counter(
+    "amma_story_evaluations_total", "Story evaluations by source (local/editor) and result."
+)
+INVALID_VERDICTS = Counter(
+    "amma_story_invalid_verdicts_total",
+    "Editor replies without a usable verdict, by reason (no_verdict/invalid).",
+)
+COALESCED_CALLS = Counter(
+    "amma_story_coalesced_total",
+    "Story generations and verdicts served by an identical request already in flight, by node.",
+)
+OPTIMISTIC_STORIES = Counter(
+    "amma_story_optimistic_total",
+    "Stories presented before evaluation, by outcome (confirmed/corrected).",
+)
+TURN_LATENCY = Histogram("amma_turn_latency_seconds", "Agent turn run time by mode.")
+TURN_ERRORS = Counter("amma_turn_errors_total", "Agent turns that failed, by mode.")
+DEGRADATIONS = Counter(
+    "amma_turn_degradations_total",
+    "Story steps cut short to meet a turn's latency budget, by kind.",
+)
+DEADLINE_MISSES = Counter(
+    "amma_turn_deadline_missed_total", "Turns that finished after their latency budget, by mode."
+)
+TYPING_LATENCY = Histogram(
+    "amma_stream_response_seconds", "Time spent replaying a finished reply as typed chunks."
+)
+
+_METRICS: List[Any] = [
+    NODE_LATENCY,
+    NODE_ERRORS,
+    TOKENS,
+    LLM_CALLS,
+    LLM_FAILURES,
+    HEDGED_CALLS,
+    FAILOVERS,
+    STORY_REVISIONS,
+    REVISION_MODES,
+    EVALUATIONS,
+    INVALID_VERDICTS,
+    COALESCED_CALLS,
+    OPTIMISTIC_STORIES,
+    TURN_LATENCY,
+    TURN_ERRORS,
+    DEGRADATIONS,
+    DEADLINE_MISSES,
+    TYPING_LATENCY,
+]
+
+# Existing stats dicts (model cache, sessions, ...) exported as gauges
+_STATS_SOURCES: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def instrument_node(name: str, func: F) -> F:
+    """Wrap an async graph node to record its latency and errors.
+
+    The wrapper keeps the node's signature, so LangGraph still injects
+    ``runtime`` and the other node arguments.
+    """
+    if not METRICS_ENABLED:
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            NODE_ERRORS.inc(node=name)
+            raise
+        finally:
+            NODE_LATENCY.observe(time.perf_counter() - start, node=name)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def record_llm_usage(node: str, response: AIMessage, model: str = "") -> None:
+    """Count an LLM call and its prompt/completion tokens for ``node``.
+
+    The ``model`` label splits usage by model tier, so cost can be priced
+    per model.
+    """
+    if not METRICS_ENABLED:
+        return
+    LLM_CALLS.inc(node=node, model=model)
+    usage = getattr(response, "usage_metadata", None)
+    if usage:
+        TOKENS.inc(usage.get("input_tokens", 0), node=node, model=model, kind="prompt")
+        TOKENS.inc(usage.get("output_tokens", 0), node=node, model=model, kind="completion")
+        # Prompt tokens the provider served from its prompt cache
+        cached = (usage.get("input_token_details") or {}).get("cache_read", 0)
+        TOKENS.inc(cached, node=node, model=model, kind="cached_prompt")
+
+
+def token_usage() -> Dict[Tuple[str, str], Dict[str, float]]:
+    """Return token totals per (node, model), keyed by kind."""
+    totals: Dict[Tuple[str, str], Dict[str, float]] = {}
+    for labels, value in TOKENS.values.items():
+        label = dict(labels)
+        kinds = totals.setdefault((label["node"], label.get("model", "")), {})
+        kinds[label["kind"]] = kinds.get(label["kind"], 0) + value
+    return totals
+
+
+def mean_latency(node: str) -> Optional[float]:
+    """Return a node's mean run time so far, or None if it has not run (or metrics are off)."""
+    series = NODE_LATENCY.values.get(_labels({"node": node}))
+    if not series or not series[2]:
+        return None
+    return series[1] / series[2]
+
+
+def prompt_cache_ratios() -> Dict[str, float]:
+    """Return the share of prompt tokens served from the provider cache, per node."""
+    totals: Dict[str, Dict[str, float]] = {}
+    for (node, _), usage in token_usage().items():
+        kinds = totals.setdefault(node, {})
+        for kind, value in usage.items():
+            kinds[kind] = kinds.get(kind, 0) + value
+    return {
+        node: kinds.get("cached_prompt", 0) / kinds["prompt"]
+        for node, kinds in totals.items()
+        if kinds.get("prompt")
+    }
+
+
+def observe(metric: Histogram, value: float, **labels: Any) -> None:
+    """Record into ``metric`` unless metrics are disabled."""
+    if METRICS_ENABLED:
+        metric.observe(value, **labels)
+
+
+def increment(metric: Counter, amount: float = 1, **labels: Any) -> None:
+    """Increment ``metric`` unless metrics are disabled."""
+    if METRICS_ENABLED:
+        metric.inc(amount, **labels)
+
+
+def register_stats(prefix: str, source: Callable[[], Dict[str, Any]]) -> None:
+    """Export a stats function's numeric values as ``<prefix>_<key>`` gauges."""
+    _STATS_SOURCES[prefix] = source
+
+
+def render_metrics() -> str:
+    """Return all metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for metric in _METRICS:
+        lines += metric.render()
+    ratio = "amma_llm_prompt_cache_ratio"
+    lines += [f"# HELP {ratio} Share of prompt tokens read from the provider's prompt cache.",
+              f"# TYPE {ratio} gauge"]
+    lines += [
+        f"{ratio}{_format_labels((('node', node),))} {_format_value(value)}"
+        for node, value in prompt_cache_ratios().items()
+    ]
+    for prefix, source in _STATS_SOURCES.items():
+        for key, value in source().items():
+            if isinstance(value, (int, float)):
+                name = f"{prefix}_{key}"
+                lines += [f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+    return "\n".join(lines) + "\n"
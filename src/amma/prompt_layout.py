@@ -0,0 +1,99 @@
+"""Assemble system prompts with a cache-friendly layout.
+
+Providers cache prompts by exact prefix (OpenAI from 1024 tokens, Anthropic
+per marked block). Static instructions therefore come first and byte-for-byte
+identical on every call; session values and the date follow in a trailing
+section.
+
+Templates are parsed once at import. Rendering reads only the state fields a
+prompt uses (its projection) and joins pre-split literals, instead of running
+``str.format`` over a multi-kilobyte template per call.
+"""
+
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from string import Formatter
+from typing import Any, Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from src.amma.prompts import (
+    AMMA_PROMPT,
+    AMMA_SESSION,
+    STORY_CREATOR_INPUTS,
+    STORY_CREATOR_PROMPT,
+    STORY_EDITOR_INPUTS,
+    STORY_EDITOR_PROMPT,
+    STORY_REVISION_INPUTS,
+    STORY_REVISION_PROMPT,
+)
+
+
+def prompt_time() -> str:
+    """Return the date for prompts; finer precision would only add churn."""
+    return datetime.now(tz=UTC).date().isoformat()
+
+
+class PromptTemplate:
+    """Static instructions plus a per-call section, parsed once."""
+
+    def __init__(self, instructions: str, section: str, defaults: Mapping[str, str]):
+        self.prefix = f"{instructions.rstrip()}\n\n"
+        self.defaults = dict(defaults)
+        self._parts: List[Tuple[str, Optional[str]]] = [
+            (literal, field) for literal, field, _, _ in Formatter().parse(section)
+        ]
+        # The projection: state fields this prompt reads
+        self.fields: FrozenSet[str] = frozenset(
+            field for _, field in self._parts if field and field != "system_time"
+        )
+
+    def project(self, state: Any, **overrides: Any) -> Dict[str, Any]:
+        """Read only this prompt's fields from ``state``, applying defaults."""
+        values = {
+            field: getattr(state, field, None) or self.defaults.get(field, "")
+            for field in self.fields
+            if field not in overrides
+        }
+        values.update(overrides)
+        return values
+
+    def render(self, state: Any = None, **overrides: Any) -> str:
+        """Render the prompt for ``state``; keyword arguments override fields."""
+        values = self.project(state, **overrides)
+        values.setdefault("system_time", prompt_time())
+        pieces = [self.prefix]
+        for literal, field in self._parts:
+            pieces.append(literal)
+            if field is not None:
+                pieces.append(str(values[field]))
+        return "".join(pieces)
+
+
+AMMA_TEMPLATE = PromptTemplate(
+    AMMA_PROMPT,
+    AMMA_SESSION,
+    defaults={
+        "child_name": "None",
+        "story_theme": "None",
+        "generated_story": "None",
+        "suggested_revisions": "None",
+    },
+)
+
+STORY_CREATOR_TEMPLATE = PromptTemplate(
+    STORY_CREATOR_PROMPT,
+    STORY_CREATOR_INPUTS,
+    defaults={"story_theme": "magical adventure"},
+)
+
+STORY_REVISION_TEMPLATE = PromptTemplate(
+    STORY_REVISION_PROMPT,
+    STORY_REVISION_INPUTS,
+    defaults={"story_theme": "magical adventure", "child_name": "little one"},
+)
+
+STORY_EDITOR_TEMPLATE = PromptTemplate(
+    STORY_EDITOR_PROMPT,
+    STORY_EDITOR_INPUTS,
+    defaults={"story_theme": "magical adventure", "suggested_revisions": "None"},
+)
@@ -0,0 +1,255 @@
+"""Timeouts, hedged requests, failover and circuit breakers for model calls.
+
+A hosted model occasionally hangs or answers far slower than usual, and a
+provider can fail outright. ``call_model`` wraps every node's model call:
+
+- Timeout: a call that runs past its tier's timeout (``Context.timeout_seconds``)
+  fails. The timeout is our own deadline, not a provider error, so it does
+  not count toward the circuit breaker.
+- Hedging: a call still running after the ``Context.hedge_percentile``
+  percentile of the tier's recent latencies gets an identical second request,
+  and the first answer wins. Hedges do not stream tokens, so calls whose
+  tokens can reach the child (AMMA's replies, story drafts) are not hedged.
+- Failover: when the tier's model fails, ``Context.fallback_model`` serves
+  the call instead. Each model tried is tagged with a ``model_attempt``
+  (0, 1, ...) in its run metadata, so a consumer of streamed tokens can
+  discard those of a call that failed part-way.
+- Circuit breaker: after ``AMMA_BREAKER_FAILURES`` consecutive failures a
+  model is skipped for ``AMMA_BREAKER_RESET`` seconds, then one probe call is
+  let through; its success closes the circuit again.
+
+Breakers and latency samples are per process.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set, Tuple, cast
+
+from langchain_core.messages import AIMessage
+
+from src.amma.context import Context
+from src.amma.metrics import FAILOVERS, HEDGED_CALLS, LLM_FAILURES, increment
+from src.amma.utils import load_chat_model, load_tool_model
+
+# Latencies kept per (tier, model), and the number needed before hedging
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+
+class ModelTimeoutError(TimeoutError):
+    """Raised when a model call does not finish within its timeout."""
+
+
+class ModelUnavailableError(RuntimeError):
+    """Raised when neither a tier's model nor its fallback could serve a call."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one model."""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        """Whether calls are currently being skipped."""
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        """Return whether a call may go to the model now.
+
+        An open circuit lets one probe through per ``reset_seconds``.
+        """
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.reset_seconds:
+            return False
+        self.opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        """Close the circuit."""
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit at the threshold."""
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class ModelHealth:
+    """Circuit breakers per model and recent call latencies per tier and model."""
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latencies: Dict[Tuple[str, str], Deque[float]] = {}
+
+    def breaker(self, model: str) -> CircuitBreaker:
+        """Return the model's circuit breaker."""
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(
+                self.failure_threshold, self.reset_seconds
+            )
+        return breaker
+
+    def observe(self, tier: str, model: str, seconds: float) -> None:
+        """Record the latency of a successful call."""
+        samples = self._latencies.get((tier, model))
+        if samples is None:
+            samples = self._latencies[(tier, model)] = deque(maxlen=LATENCY_WINDOW)
+        samples.append(seconds)
+
+    def percentile(self, tier: str, model: str, pct: float) -> Optional[float]:
+        """Return the nearest-rank latency percentile, or None with too few samples."""
+        samples = self._latencies.get((tier, model))
+        if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of tracked and open circuits."""
+        return {
+            "circuits": len(self._breakers),
+            "open_circuits": sum(breaker.is_open for breaker in self._breakers.values()),
+        }
+
+
+def create_model_health() -> ModelHealth:
+    """Create the breaker registry configured through environment variables."""
+    return ModelHealth(
+        failure_threshold=int(os.getenv("AMMA_BREAKER_FAILURES", 5)),
+        reset_seconds=float(os.getenv("AMMA_BREAKER_RESET", 30)),
+    )
+
+
+# Process-wide model health
+model_health = create_model_health()
+
+
+async def _hedged_call(
+    model: Any,
+    messages: Sequence[Any],
+    tier: str,
+    model_name: str,
+    timeout: float,
+    hedge_after: Optional[float],
+) -> AIMessage:
+    """Run one call with a timeout, sending a hedge after ``hedge_after`` seconds."""
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + timeout if timeout > 0 else math.inf
+    pending: Set[asyncio.Future[Any]] = {asyncio.ensure_future(model.ainvoke(messages))}
+    hedge: Optional[asyncio.Future[Any]] = None
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            wake = deadline
+            if hedge is None and hedge_after is not None:
+                wake = min(wake, start + hedge_after)
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=None if wake == math.inf else max(0.0, wake - loop.time()),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        increment(HEDGED_CALLS, tier=tier, model=model_name, outcome="won")
+                    model_health.observe(tier, model_name, loop.time() - start)
+                    return cast(AIMessage, task.result())
+                error = task.exception()
+            if not pending:
+                break
+            if loop.time() >= deadline:
+                raise ModelTimeoutError(f"{model_name} did not answer within {timeout:g}s")
+            if hedge is None and hedge_after is not None and not done:
+                # Slower than usual: race an identical request, without streaming its tokens
+                hedge = asyncio.ensure_future(model.ainvoke(messages, config={"callbacks": []}))
+                pending.add(hedge)
+                increment(HEDGED_CALLS, tier=tier, model=model_name, outcome="sent")
+    finally:
+        for task in pending:
+            task.cancel()
+    # Every request failed
+    raise cast(BaseException, error)
+
+
+async def call_model(
+    context: Context,
+    tier: str,
+    messages: Sequence[Any],
+    tools: Sequence[Any] = (),
+    tool_choice: Optional[str] = None,
+    hedge: bool = True,
+) -> Tuple[AIMessage, str]:
+    """Call a tier's model with timeout, hedging, failover and circuit breaking.
+
+    Args:
+        context: Run configuration; supplies the model, fallback and limits.
+        tier: ``amma``, ``creator`` or ``evaluator``.
+        messages: Messages for the model.
+        tools: Tools to bind, if any.
+        tool_choice: Name of a tool the model must call, if any.
+        hedge: Whether the call may be hedged; off for calls whose tokens stream.
+
+    Returns:
+        The response and the name of the model that served it.
+
+    Raises:
+        ModelUnavailableError: If every candidate model failed or is open.
+    """
+    primary, kwargs = context.model_settings(tier)
+    candidates: List[str] = [primary]
+    if context.fallback_model and context.fallback_model != primary:
+        candidates.append(context.fallback_model)
+
+    errors: List[str] = []
+    attempt = 0
+    for model_name in candidates:
+        breaker = model_health.breaker(model_name)
+        if not breaker.allow():
+            increment(LLM_FAILURES, tier=tier, model=model_name, reason="circuit_open")
+            errors.append(f"{model_name}: circuit open")
+            continue
+        if tools:
+            model = load_tool_model(model_name, tools, tool_choice=tool_choice, **kwargs)
+        else:
+            model = load_chat_model(model_name, **kwargs)
+        model = model.with_config(metadata={"model_attempt": attempt})
+        attempt += 1
+        hedge_after = None
+        if hedge and context.hedge_percentile > 0:
+            hedge_after = model_health.percentile(tier, model_name, context.hedge_percentile)
+        try:
+            response = await _hedged_call(
+                model, messages, tier, model_name, context.timeout_seconds(tier), hedge_after
+            )
+        except ModelTimeoutError as e:
+            increment(LLM_FAILURES, tier=tier, model=model_name, reason="timeout")
+            errors.append(f"{model_name}: {e}")
+            continue
+        except Exception as e:
+            breaker.record_failure()
+            increment(LLM_FAILURES, tier=tier, model=model_name, reason="error")
+            errors.append(f"{model_name}: {e}")
+            continue
+        breaker.record_success()
+        if model_name != primary:
+            increment(FAILOVERS, tier=tier)
+        return response, model_name
+    raise ModelUnavailableError("No model could answer (" + "; ".join(errors) + ")")
@@ -0,0 +1,60 @@
+"""Paragraph patches for revising an existing story.
+
+A child's revision ("make the dragon friendlier") usually touches a few
+paragraphs. Instead of regenerating the whole story, the creator sees the
+story as numbered paragraphs and returns only the ones that change; the patch
+is applied locally.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import List
+
+from pydantic import BaseModel, Field
+
+_PARAGRAPH_BREAK_RE = re.compile(r"\n\s*\n")
+
+
+class ParagraphEdit(BaseModel):
+    """Replacement text for one paragraph."""
+
+    index: int = Field(description="Number of the paragraph to replace, as shown in [brackets].")
+    text: str = Field(
+        description="The complete new paragraph. Use blank lines to split it into several "
+        "paragraphs; leave empty to remove the paragraph."
+    )
+
+
+class StoryPatch(BaseModel):
+    """The paragraphs to change to apply a revision, and nothing else."""
+
+    edits: List[ParagraphEdit] = Field(
+        description="One entry per changed paragraph. Unchanged paragraphs are not listed."
+    )
+
+
+def split_paragraphs(story: str) -> List[str]:
+    """Split a story into its non-empty paragraphs."""
+    return [p.strip() for p in _PARAGRAPH_BREAK_RE.split(story) if p.strip()]
+
+
+def number_paragraphs(paragraphs: List[str]) -> str:
+    """Render paragraphs with their ``[index]`` for the revision prompt."""
+    return "\n\n".join(f"[{i}] {paragraph}" for i, paragraph in enumerate(paragraphs))
+
+
+def apply_patch(paragraphs: List[str], patch: StoryPatch) -> str:
+    """Apply a patch and return the revised story.
+
+    Raises ValueError if the patch is empty or refers to unknown paragraphs,
+    so the caller can fall back to a full rewrite.
+    """
+    if not patch.edits:
+        raise ValueError("Story patch has no edits")
+    revised = list(paragraphs)
+    for edit in patch.edits:
+        if not 0 <= edit.index < len(paragraphs):
+            raise ValueError(f"Story patch refers to unknown paragraph {edit.index}")
+        revised[edit.index] = edit.text.strip()
+    return "\n\n".join(p for p in revised if p)
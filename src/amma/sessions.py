@@ -0,0 +1,298 @@
+"""Session storage for the AMMA server.
+
+A session is a small dict holding the agent ``context`` plus bookkeeping; the
+conversation itself is persisted by the graph's checkpointer. Stores bound how
+long abandoned sessions are kept around so memory stays flat under sustained
+traffic, and notify an eviction hook so the matching thread can be dropped too.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from src.amma.context import Context
+
+# Called with the session id whenever a session expires or is evicted
+EvictionHook = Callable[[str], None]
+
+
+def estimate_state_size(values: Mapping[str, Any]) -> int:
+    """Roughly estimate the memory held by a conversation state, in bytes.
+
+    Counts the text of messages and story fields, which dominate a session's
+    footprint, without serializing the whole state.
+    """
+    size = 0
+    for message in values.get("messages") or ():
+        content = message.content
+        size += len(content) if isinstance(content, str) else len(str(content))
+    for key in ("generated_story", "current_story", "suggested_revisions", "evaluation_feedback"):
+        text = values.get(key)
+        if text:
+            size += len(text)
+    return size
+
+
+def new_session() -> Dict[str, Any]:
+    """Create the data for a fresh session.
+
+    The conversation state itself lives in the graph's checkpointer under
+    ``thread_id = session_id``; the session only tracks the agent context and
+    bookkeeping used for eviction.
+    """
+    return {"context": Context(), "turns": 0, "state_size": 0}
+
+
+def dump_session(data: Dict[str, Any]) -> str:
+    """Serialize session data to JSON."""
+    return json.dumps({**data, "context": asdict(data["context"])})
+
+
+def load_session(raw: str) -> Dict[str, Any]:
+    """Deserialize session data produced by ``dump_session``."""
+    payload = json.loads(raw)
+    return {**payload, "context": Context(**payload["context"])}
+
+
+class SessionStore(ABC):
+    """Interface for session storage backends."""
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the session data, or None if missing or expired."""
+
+    @abstractmethod
+    def put(self, session_id: str, data: Dict[str, Any]) -> None:
+        """Create or replace a session."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Delete a session. Returns whether it existed."""
+
+    @abstractmethod
+    def session_ids(self) -> List[str]:
+        """Return the ids of all live sessions."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss, size and eviction counters."""
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __len__(self) -> int:
+        return len(self.session_ids())
+
+
+class InMemorySessionStore(SessionStore):
+    """LRU session store with idle TTL and count/byte caps.
+
+    Sessions idle for longer than ``ttl_seconds`` expire. When either cap is
+    exceeded the least recently used sessions are evicted first.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: float = 6 * 60 * 60,
+        on_evict: Optional[EvictionHook] = None,
+    ):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        # session_id -> (data, estimated size, last access time)
+        self._sessions: OrderedDict[str, Tuple[Dict[str, Any], int, float]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "misses": 0,
+            "evicted_expired": 0,
+            "evicted_lru": 0,
+            "evicted_size": 0,
+        }
+
+    def _remove(self, session_id: str) -> None:
+        _, size, _ = self._sessions.pop(session_id)
+        self._bytes -= size
+
+    def _evict(self, session_id: str, reason: str) -> None:
+        self._remove(session_id)
+        self._counters[f"evicted_{reason}"] += 1
+        if self.on_evict is not None:
+            self.on_evict(session_id)
+
+    def _expire(self, now: float) -> None:
+        # Entries are ordered by last access, so expired ones sit at the front
+        while self._sessions:
+            session_id, (_, _, accessed) = next(iter(self._sessions.items()))
+            if now - accessed < self.ttl_seconds:
+                break
+            self._evict(session_id, "expired")
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Return the session data and mark it as recently used."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            data, size, _ = entry
+            self._sessions[session_id] = (data, size, now)
+            self._sessions.move_to_end(session_id)
+            self._counters["hits"] += 1
+            return data
+
+    def put(self, session_id: str, data: Dict[str, Any]) -> None:
+        """Store a session, evicting old ones if a cap is exceeded."""
+        now = time.monotonic()
+        size = data.get("state_size", 0)
+        with self._lock:
+            if session_id in self._sessions:
+                self._remove(session_id)
+            self._sessions[session_id] = (data, size, now)
+            self._bytes += size
+            self._expire(now)
+            while len(self._sessions) > self.max_sessions:
+                self._evict(next(iter(self._sessions)), "lru")
+            # Never evict the session being written, even if it alone is too big
+            while self._bytes > self.max_bytes and len(self._sessions) > 1:
+                self._evict(next(iter(self._sessions)), "size")
+
+    def delete(self, session_id: str) -> bool:
+        """Delete a session. Returns whether it existed."""
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._remove(session_id)
+            return True
+
+    def session_ids(self) -> List[str]:
+        """Return the ids of all live sessions."""
+        with self._lock:
+            self._expire(time.monotonic())
+            return list(self._sessions)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss, size and eviction counters."""
+        with self._lock:
+            return {
+                **self._counters,
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+            }
+
+
+class SQLiteSessionStore(SessionStore):
+    """Session store persisted to a SQLite file, so sessions survive restarts.
+
+    Sessions idle for longer than ``ttl_seconds`` are deleted lazily on write.
+    """
+
+    def __init__(
+        self,
+        path: str = "amma_sessions.db",
+        ttl_seconds: float = 24 * 60 * 60,
+        on_evict: Optional[EvictionHook] = None,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.on_evict = on_evict
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evicted_expired": 0}
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Load a session from disk."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, updated_at FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None or time.time() - row[1] >= self.ttl_seconds:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+        return load_session(row[0])
+
+    def put(self, session_id: str, data: Dict[str, Any]) -> None:
+        """Write a session to disk and drop expired ones."""
+        raw = dump_session(data)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (id, data, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                (session_id, raw, now),
+            )
+            expired = [
+                row[0] for row in self._conn.execute(
+                    "SELECT id FROM sessions WHERE updated_at < ?", (now - self.ttl_seconds,)
+                )
+            ]
+            self._conn.executemany("DELETE FROM sessions WHERE id = ?", [(i,) for i in expired])
+            self._counters["evicted_expired"] += len(expired)
+        if self.on_evict is not None:
+            for expired_id in expired:
+                self.on_evict(expired_id)
+
+    def delete(self, session_id: str) -> bool:
+        """Delete a session. Returns whether it existed."""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            return cursor.rowcount > 0
+
+    def session_ids(self) -> List[str]:
+        """Return the ids of all live sessions."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM sessions WHERE updated_at >= ?",
+                (time.time() - self.ttl_seconds,),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss, size and eviction counters."""
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM sessions"
+            ).fetchone()
+            return {**self._counters, "sessions": count, "bytes": size}
+
+
+def create_session_store(on_evict: Optional[EvictionHook] = None) -> SessionStore:
+    """Create the session store configured through environment variables.
+
+    ``AMMA_SESSION_STORE`` selects ``memory`` (default) or ``sqlite``.
+    """
+    backend = os.getenv("AMMA_SESSION_STORE", "memory").lower()
+    if backend == "sqlite":
+        return SQLiteSessionStore(
+            path=os.getenv("AMMA_SESSION_DB", "amma_sessions.db"),
+            ttl_seconds=float(os.getenv("AMMA_SESSION_TTL", 24 * 60 * 60)),
+            on_evict=on_evict,
+        )
+    if backend == "memory":
+        return InMemorySessionStore(
+            max_sessions=int(os.getenv("AMMA_SESSION_MAX", 1000)),
+            max_bytes=int(os.getenv("AMMA_SESSION_MAX_BYTES", 256 * 1024 * 1024)),
+            ttl_seconds=float(os.getenv("AMMA_SESSION_TTL", 6 * 60 * 60)),
+            on_evict=on_evict,
+        )
+    raise ValueError(f"Unknown session store: {backend}")
@@ -0,0 +1,62 @@
+"""Single-flight: concurrent identical calls share one execution.
+
+At peak many sessions ask for the same theme at the same moment. Keyed on the
+normalized request, the first caller runs the generation and later callers
+await its result instead of paying for their own. The call runs as its own
+task, so a caller that goes away (a dropped turn) does not cancel it for the
+others; an error reaches every waiter.
+
+Flights are per process: with several workers each one coalesces its own
+sessions.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def _consume_exception(task: asyncio.Task[Any]) -> None:
+    # Every waiter may be gone; keep asyncio from logging the error as unretrieved
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls by key."""
+
+    def __init__(self) -> None:
+        self._flights: Dict[str, asyncio.Task[Any]] = {}
+        self._counters = {"leaders": 0, "coalesced": 0}
+
+    def _land(self, key: str, flight: asyncio.Task[Any]) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Run ``func`` unless a call for ``key`` is already in flight.
+
+        Returns:
+            The call's result, and whether it came from another caller's call.
+        """
+        flight = self._flights.get(key)
+        coalesced = flight is not None
+        if flight is None:
+            flight = asyncio.ensure_future(func())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._land(key, done))
+            flight.add_done_callback(_consume_exception)
+            self._counters["leaders"] += 1
+        else:
+            self._counters["coalesced"] += 1
+        return await asyncio.shield(flight), coalesced
+
+    def stats(self) -> Dict[str, int]:
+        """Return leader and coalesced call counters and the flights in progress."""
+        return {**self._counters, "in_flight": len(self._flights)}
+
+
+# Process-wide flights for story generation and evaluation
+story_flights = SingleFlight()
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Optional, Sequence
+from typing import List, Optional, Sequence
 
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
@@ -63,7 +63,50 @@ class State(InputState):
         description="Detailed feedback from story evaluation."
     )
 
+    evaluation_score: Optional[int] = Field(
+        default=None,
+        description="Editor's 1-10 quality score for the story currently being evaluated."
+    )
+
+    evaluation_source: Optional[str] = Field(
+        default=None,
+        description="Who evaluated the story: 'local' rule checks or the LLM 'editor'; "
+        "'skipped' when the turn budget ran out, 'unverified' when the editor's verdict "
+        "was unusable."
+    )
+
+    revision_instructions: List[str] = Field(
+        default_factory=list,
+        description="Concrete fixes from the editor for the next draft."
+    )
+
     revision_count: int = Field(
         default=0,
         description="Number of revision cycles attempted."
     )
+
+    draft_stories: List[str] = Field(
+        default_factory=list,
+        description="Speculative drafts awaiting evaluation when several are generated at once."
+    )
+
+    story_from_cache: bool = Field(
+        default=False,
+        description="Whether the current story was served from the story cache."
+    )
+
+    turn_deadline: Optional[float] = Field(
+        default=None,
+        description="Wall-clock time (epoch seconds) by which the current turn should finish."
+    )
+
+    degradations: List[str] = Field(
+        default_factory=list,
+        description="Steps cut short in the current turn to meet its latency budget."
+    )
+
+    provisional_message_id: Optional[str] = Field(
+        default=None,
+        description="Id of a story message shown before the editor's verdict (optimistic "
+        "presentation); a corrected story replaces that message."
+    )
@@ -0,0 +1,167 @@
+"""Cache of approved stories, consulted before ``story_creator``.
+
+Popular themes are requested over and over, and each fresh story costs at
+least a creator and an editor call. Approved stories are stored with the
+child's name replaced by a placeholder, keyed on the normalized theme, the
+revision text and the model, and personalized again when served.
+
+Variety policy: a key serves cached stories only once ``variants`` different
+stories have been approved for it, then picks one of them at random. Until
+then every request generates (and adds) a new variant.
+
+The memory tier is an LRU over keys; an optional SQLite tier keeps stories
+across restarts and is read through on memory misses.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+# Stands in for the child's name in stored stories
+NAME_PLACEHOLDER = "⟨child_name⟩"
+
+# Name used by the creator prompt when the child's name is unknown
+DEFAULT_CHILD_NAME = "little one"
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase and collapse whitespace and punctuation for use in keys."""
+    return " ".join(re.findall(r"[a-z0-9']+", (text or "").lower()))
+
+
+def story_key(
+    theme: Optional[str],
+    revisions: Optional[str],
+    model: str,
+    base_story: Optional[str] = None,
+) -> str:
+    """Return the cache key for a story request.
+
+    When an existing story is being revised, its text is part of the key so a
+    revision is never served for a different story.
+    """
+    parts = [normalize(theme), normalize(revisions), model]
+    if base_story:
+        parts.append(hashlib.sha256(base_story.encode()).hexdigest())
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+def depersonalize(story: str, child_name: Optional[str]) -> str:
+    """Replace the child's name in a story with the placeholder."""
+    if not child_name:
+        return story
+    return re.sub(rf"\b{re.escape(child_name)}\b", NAME_PLACEHOLDER, story)
+
+
+def personalize(story: str, child_name: Optional[str]) -> str:
+    """Put the child's name back into a stored story."""
+    return story.replace(NAME_PLACEHOLDER, child_name or DEFAULT_CHILD_NAME)
+
+
+class StoryCache:
+    """LRU of approved story variants per key, optionally backed by SQLite."""
+
+    def __init__(self, max_keys: int = 500, variants: int = 3, path: Optional[str] = None):
+        self.max_keys = max_keys
+        self.variants = max(1, variants)
+        self.path = path
+        self._memory: OrderedDict[str, List[str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+        self._conn: Optional[sqlite3.Connection] = None
+        if path:
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS stories ("
+                "key TEXT NOT NULL, story TEXT NOT NULL, PRIMARY KEY (key, story))"
+            )
+
+    def _load(self, key: str) -> List[str]:
+        stories = self._memory.get(key)
+        if stories is not None:
+            self._memory.move_to_end(key)
+            return stories
+        if self._conn is None:
+            return []
+        stories = [
+            row[0]
+            for row in self._conn.execute("SELECT story FROM stories WHERE key = ?", (key,))
+        ][: self.variants]
+        if stories:
+            self._remember(key, stories)
+        return stories
+
+    def _remember(self, key: str, stories: List[str]) -> None:
+        self._memory[key] = stories
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_keys:
+            self._memory.popitem(last=False)
+            self._counters["evicted"] += 1
+
+    def get(self, key: str) -> Optional[str]:
+        """Return a depersonalized story for ``key``, or None on a miss.
+
+        Keys with fewer than ``variants`` stories miss, so new variants are
+        generated until the key has enough variety.
+        """
+        with self._lock:
+            stories = self._load(key)
+            if len(stories) < self.variants:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+            return random.choice(stories)
+
+    def put(self, key: str, story: str) -> None:
+        """Store a depersonalized, approved story as a variant of ``key``."""
+        with self._lock:
+            stories = self._load(key)
+            if story in stories or len(stories) >= self.variants:
+                return
+            self._remember(key, [*stories, story])
+            self._counters["stored"] += 1
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO stories (key, story) VALUES (?, ?)", (key, story)
+                )
+
+    def clear(self) -> None:
+        """Drop all cached stories from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM stories")
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss, store and eviction counters."""
+        with self._lock:
+            return {**self._counters, "keys": len(self._memory)}
+
+
+def create_story_cache() -> Optional[StoryCache]:
+    """Create the story cache configured through environment variables.
+
+    ``AMMA_STORY_CACHE`` selects ``off`` (default), ``memory`` or ``sqlite``.
+    """
+    backend = os.getenv("AMMA_STORY_CACHE", "off").lower()
+    if backend == "off":
+        return None
+    if backend not in ("memory", "sqlite"):
+        raise ValueError(f"Unknown story cache: {backend}")
+    return StoryCache(
+        max_keys=int(os.getenv("AMMA_STORY_CACHE_MAX", 500)),
+        variants=int(os.getenv("AMMA_STORY_CACHE_VARIANTS", 3)),
+        path=os.getenv("AMMA_STORY_CACHE_DB", "amma_stories.db") if backend == "sqlite" else None,
+    )
+
+
+# Process-wide cache used by the graph (None when disabled)
+story_cache: Optional[StoryCache] = create_story_cache()
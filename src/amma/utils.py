@@ -1,14 +1,111 @@
 """Utility & helper functions."""
 
+from functools import cache
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
 from langchain.chat_models import init_chat_model
-from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models import BaseChatModel, LanguageModelInput
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+
+# Model instances are cached process-wide so every node execution reuses the
+# same client (and therefore the same HTTP connection pool) instead of building
+# a fresh one per call. Keys include the binding config, so nodes that need a
+# different temperature or token limit still get their own instance.
+
+# Model instances shared by plain and tool-bound lookups. Kept apart from the
+# two lookup caches so each cache's hit counters only count its own callers.
+_models: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], BaseChatModel] = {}
+
+
+def _shared_model(
+    fully_specified_name: str, frozen_kwargs: Tuple[Tuple[str, Any], ...]
+) -> BaseChatModel:
+    model = _models.get((fully_specified_name, frozen_kwargs))
+    if model is not None:
+        return model
+    provider, name = fully_specified_name.split("/", maxsplit=1)
+    if provider == "fake":
+        from src.amma.fake import create_fake_model
+
+        model = create_fake_model(name, **dict(frozen_kwargs))
+    else:
+        model = init_chat_model(name, model_provider=provider, **dict(frozen_kwargs))
+    return _models.setdefault((fully_specified_name, frozen_kwargs), model)
+
+
+@cache
+def _init_model(
+    fully_specified_name: str, frozen_kwargs: Tuple[Tuple[str, Any], ...]
+) -> BaseChatModel:
+    return _shared_model(fully_specified_name, frozen_kwargs)
+
+
+@cache
+def _bind_tools(
+    fully_specified_name: str,
+    frozen_kwargs: Tuple[Tuple[str, Any], ...],
+    tools: Tuple[Any, ...],
+    tool_choice: Optional[str] = None,
+) -> Runnable[LanguageModelInput, BaseMessage]:
+    # The bound variant wraps the cached base model, so both share one client
+    # and the tool schemas are converted only once.
+    model = _shared_model(fully_specified_name, frozen_kwargs)
+    if tool_choice is None:
+        return model.bind_tools(list(tools))
+    return model.bind_tools(list(tools), tool_choice=tool_choice)
+
+
+def _freeze(kwargs: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple(sorted(kwargs.items()))
 
 
-def load_chat_model(fully_specified_name: str) -> BaseChatModel:
+def load_chat_model(fully_specified_name: str, **kwargs: Any) -> BaseChatModel:
     """Load a chat model from a fully specified name.
 
+    Instances are cached per (name, kwargs), so repeated calls are cheap.
+
     Args:
         fully_specified_name (str): String in the format 'provider/model'.
+            ``fake/<preset>`` loads the offline model from ``src.amma.fake``.
+        **kwargs: Extra (hashable) model parameters such as temperature.
     """
-    provider, model = fully_specified_name.split("/", maxsplit=1)
-    return init_chat_model(model, model_provider=provider)
+    return _init_model(fully_specified_name, _freeze(kwargs))
+
+
+def load_tool_model(
+    fully_specified_name: str,
+    tools: Sequence[Callable[..., Any] | type],
+    tool_choice: Optional[str] = None,
+    **kwargs: Any,
+) -> Runnable[LanguageModelInput, BaseMessage]:
+    """Load a cached chat model with the given tools already bound.
+
+    Args:
+        fully_specified_name (str): String in the format 'provider/model'.
+        tools: Tools (functions or pydantic schemas) to bind to the model.
+        tool_choice: Name of a tool the model must call, if any.
+        **kwargs: Extra (hashable) model parameters such as temperature.
+    """
+    return _bind_tools(fully_specified_name, _freeze(kwargs), tuple(tools), tool_choice)
+
+
+def model_cache_stats() -> Dict[str, int]:
+    """Return hit/miss counters for the process-wide model registry."""
+    models = _init_model.cache_info()
+    bound = _bind_tools.cache_info()
+    return {
+        "model_hits": models.hits,
+        "model_misses": models.misses,
+        "bound_hits": bound.hits,
+        "bound_misses": bound.misses,
+        "cached_models": len(_models),
+        "cached_bound_models": bound.currsize,
+    }
+
+
+def clear_model_cache() -> None:
+    """Drop all cached model instances (e.g. after rotating API keys)."""
+    _bind_tools.cache_clear()
+    _init_model.cache_clear()
+    _models.clear()
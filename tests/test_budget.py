@@ -0,0 +1,24 @@
+import math
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app
+from src.amma.budget import parse_budget
+
+
+@pytest.mark.parametrize("value, expected", [(None, None), (5, 5.0), ("2.5", 2.5), (1e9, 300.0)])
+def test_parse_budget_accepts_positive_numbers(value, expected):
+    assert parse_budget(value, 300.0) == expected
+
+
+@pytest.mark.parametrize("value", ["soon", "", 0, -1, math.nan, True, [5]])
+def test_parse_budget_rejects_other_values(value):
+    with pytest.raises(ValueError):
+        parse_budget(value, 300.0)
+
+
+def test_rest_rejects_invalid_budget():
+    client = TestClient(app.app)
+    response = client.post("/chat", json={"message": "hi", "budget_seconds": -1})
+    assert response.status_code == 422
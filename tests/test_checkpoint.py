@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from src.amma.checkpoint import open_checkpointer, prune_thread, thread_config
+from src.amma.context import Context
+from src.amma.graph import compile_graph
+
+TURNS = [
+    "Hi, I'm Mia",
+    "Tell me a story about a brave turtle",
+    "Can the turtle have a friend?",
+    "That was lovely",
+]
+
+
+async def turn(agent, thread_id, message):
+    return await agent.ainvoke(
+        {"messages": [HumanMessage(content=message)]},
+        thread_config(thread_id),
+        context=Context(model="fake/instant"),
+    )
+
+
+async def checkpoint_count(checkpointer, thread_id):
+    return len([c async for c in checkpointer.alist(thread_config(thread_id))])
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_pruned_thread_keeps_its_state_and_resumes(backend, tmp_path):
+    async def scenario():
+        async with open_checkpointer(backend, str(tmp_path / "checkpoints.db")) as checkpointer:
+            agent = compile_graph(checkpointer)
+            for message in TURNS:
+                await turn(agent, "t1", message)
+            before = await agent.aget_state(thread_config("t1"))
+            assert await checkpoint_count(checkpointer, "t1") > 1
+
+            await prune_thread(checkpointer, "t1")
+
+            assert await checkpoint_count(checkpointer, "t1") == 1
+            after = await agent.aget_state(thread_config("t1"))
+            assert after.values == before.values
+            assert after.next == before.next
+
+            result = await turn(agent, "t1", "Tell me another story about a sleepy owl")
+            assert len(result["messages"]) > len(before.values["messages"])
+            assert result["story_theme"] == "a sleepy owl"
+
+    asyncio.run(scenario())
+
+
+def test_pruning_leaves_other_threads_alone():
+    async def scenario():
+        async with open_checkpointer("memory") as checkpointer:
+            agent = compile_graph(checkpointer)
+            for thread_id in ("t1", "t2"):
+                await turn(agent, thread_id, TURNS[0])
+            kept = await checkpoint_count(checkpointer, "t2")
+
+            await prune_thread(checkpointer, "t1")
+
+            assert await checkpoint_count(checkpointer, "t2") == kept
+
+    asyncio.run(scenario())
@@ -0,0 +1,103 @@
+import asyncio
+import json
+
+import pytest
+
+import app
+from app import ConnectionManager
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        if self.closed:
+            raise RuntimeError("socket closed")
+        self.sent.append(json.loads(text))
+
+
+def test_stale_disconnect_keeps_the_reconnected_socket():
+    async def scenario():
+        manager = ConnectionManager()
+        old, new = FakeSocket(), FakeSocket()
+        await manager.connect(old, "race")
+        # The tablet reconnects before the server notices the old socket died
+        await manager.connect(new, "race")
+        old.closed = True
+        await manager.disconnect("race", old)
+
+        assert manager.active_connections == {"race": new}
+        assert "race" in app.broker.local
+        await manager.send_message("race", {"type": "response", "content": "Still here"})
+        assert [frame["content"] for frame in new.sent] == ["Still here"]
+
+        await manager.disconnect("race", new)
+        assert manager.active_connections == {}
+        assert "race" not in app.broker.local
+
+    asyncio.run(scenario())
+
+
+def test_failed_delivery_to_a_replaced_socket_keeps_the_new_one():
+    async def scenario():
+        manager = ConnectionManager()
+        old, new = FakeSocket(), FakeSocket()
+        await manager.connect(old, "race-deliver")
+        old.closed = True
+        await manager.send_message("race-deliver", {"type": "typing", "content": ""})
+        assert manager.active_connections == {}
+
+        await manager.connect(new, "race-deliver")
+        await manager.disconnect("race-deliver", old)
+        await manager.send_message("race-deliver", {"type": "typing", "content": ""})
+        assert len(new.sent) == 1
+        await manager.disconnect("race-deliver", new)
+
+    asyncio.run(scenario())
+
+
+def test_frames_logged_while_registering_are_sent_once_in_order(monkeypatch):
+    async def scenario():
+        manager = ConnectionManager()
+        register = app.broker.register
+
+        async def register_then_race(session_id):
+            await register(session_id)
+            # Another worker logs a frame before this socket registered, so
+            # nobody published it, then one after, which reaches this worker
+            # while the replay is still running
+            await app.events.append(session_id, {"type": "stream_chunk", "content": "b"})
+            late = await app.events.append(session_id, {"type": "stream_chunk", "content": "c"})
+            await manager.deliver(session_id, late)
+
+        first = await app.events.append("gap", {"type": "stream_chunk", "content": "a"})
+        monkeypatch.setattr(app.broker, "register", register_then_race)
+        socket = FakeSocket()
+        await manager.connect(socket, "gap", after=0, epoch=first["epoch"])
+        await manager.send_message("gap", {"type": "stream_chunk", "content": "d"})
+
+        assert [frame["content"] for frame in socket.sent] == ["a", "b", "c", "d"]
+        assert [frame["offset"] for frame in socket.sent] == [1, 2, 3, 4]
+        await manager.disconnect("gap", socket)
+
+    asyncio.run(scenario())
+
+
+def test_turn_slot_counts_failed_turns_apart():
+    async def scenario():
+        before = dict(app.turn_stats)
+        async with app.turn_slot("stats"):
+            pass
+        with pytest.raises(RuntimeError):
+            async with app.turn_slot("stats"):
+                raise RuntimeError("model down")
+        assert app.turn_stats["completed"] == before["completed"] + 1
+        assert app.turn_stats["failed"] == before["failed"] + 1
+        assert app.turn_stats["in_flight"] == before["in_flight"]
+
+    asyncio.run(scenario())
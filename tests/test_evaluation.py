@@ -0,0 +1,46 @@
+from src.amma.evaluation import pre_evaluate
+
+SENTENCE = "The brave turtle swam home in the calm blue pond."
+
+
+def story(sentences, sentence=SENTENCE):
+    return " ".join([sentence] * sentences)
+
+
+def test_clean_story_is_approved_locally():
+    verdict = pre_evaluate(story(80), "a brave turtle")
+    assert verdict is not None and verdict.approved
+
+
+def test_story_with_the_childs_name_is_approved_locally():
+    text = story(80, "Mia Rose and the brave turtle swam in the calm pond.")
+    verdict = pre_evaluate(text, "a brave turtle")
+    assert verdict is not None and verdict.approved
+
+
+def test_scary_words_are_rejected():
+    text = story(79) + " The turtle saw a ghost with a knife."
+    verdict = pre_evaluate(text, "a brave turtle")
+    assert verdict is not None and not verdict.approved
+    assert "'ghost'" in verdict.revision_instructions[0]
+    assert "'knife'" in verdict.revision_instructions[0]
+
+
+def test_far_too_short_story_is_rejected():
+    verdict = pre_evaluate(story(10), "a brave turtle")
+    assert verdict is not None and not verdict.approved
+
+
+def test_theme_named_monster_may_mention_it():
+    text = story(79) + " The friendly monster waved."
+    verdict = pre_evaluate(text, "a friendly monster")
+    assert verdict is not None and verdict.approved
+
+
+def test_missing_theme_goes_to_the_editor():
+    assert pre_evaluate(story(80), "a sleepy dragon") is None
+
+
+def test_slightly_short_story_goes_to_the_editor():
+    # 450 words: above the hard floor, below the comfortable range
+    assert pre_evaluate(story(45), "a brave turtle") is None
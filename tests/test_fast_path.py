@@ -0,0 +1,36 @@
+import pytest
+
+from src.amma.fast_path import classify_intent
+
+
+@pytest.mark.parametrize(
+    "message",
+    ["Goodnight", "good night amma!", "bye bye", "I'm tired", "sweet dreams", "time for bed"],
+)
+def test_goodbyes_skip_the_model(message):
+    intent = classify_intent(message)
+    assert intent is not None and intent.kind == "goodbye"
+
+
+@pytest.mark.parametrize(
+    "message",
+    [
+        # Story themes in reply to "what story would you like?"
+        "a sleepover",
+        "dragons and bedtime",
+        "a sleepy bear",
+        # Negated or questioning endings
+        "I'm not tired",
+        "how do dragons sleep",
+        "tell me a bedtime story",
+    ],
+)
+def test_ambiguous_messages_go_to_the_model(message):
+    assert classify_intent(message) is None
+
+
+def test_new_story_request_keeps_the_theme():
+    intent = classify_intent("Tell me a story about a brave turtle please")
+    assert intent is not None
+    assert intent.kind == "new_story"
+    assert intent.story_theme == "a brave turtle"
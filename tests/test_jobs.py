@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+import pytest
+
+from src.amma.jobs import InMemoryEventLog, SQLiteEventLog
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_log(request, tmp_path):
+    def make(ttl_seconds):
+        if request.param == "memory":
+            return InMemoryEventLog(ttl_seconds=ttl_seconds)
+        return SQLiteEventLog(path=str(tmp_path / "events.db"), ttl_seconds=ttl_seconds)
+
+    return make
+
+
+def expire(log):
+    time.sleep(0.15)
+    if isinstance(log, SQLiteEventLog):
+        log._prune()
+
+
+def test_offsets_count_up_within_a_log(make_log):
+    async def scenario():
+        log = make_log(60)
+        frames = [await log.append("s1", {"type": "typing"}) for _ in range(3)]
+        assert [frame["offset"] for frame in frames] == [1, 2, 3]
+        assert len({frame["epoch"] for frame in frames}) == 1
+        missed = await log.read("s1", 1, frames[0]["epoch"])
+        assert [frame["offset"] for frame in missed] == [2, 3]
+
+    asyncio.run(scenario())
+
+
+def test_expired_log_starts_a_new_epoch(make_log):
+    async def scenario():
+        log = make_log(0.1)
+        old = [await log.append("s1", {"type": "typing"}) for _ in range(3)][-1]
+        expire(log)
+
+        new = await log.append("s1", {"type": "response", "content": "Hello again"})
+        assert new["offset"] == 1
+        assert new["epoch"] != old["epoch"]
+
+        # A client still at the old log's offset gets the new log's frames
+        missed = await log.read("s1", old["offset"], old["epoch"])
+        assert [frame["content"] for frame in missed] == ["Hello again"]
+        assert await log.read("s1", new["offset"], new["epoch"]) == []
+
+    asyncio.run(scenario())
+
+
+def test_jobs_round_trip(make_log):
+    async def scenario():
+        log = make_log(60)
+        await log.put_job({"job_id": "j1", "session_id": "s1", "status": "running"})
+        assert (await log.get_job("j1"))["status"] == "running"
+        assert await log.get_job("missing") is None
+
+    asyncio.run(scenario())
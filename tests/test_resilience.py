@@ -0,0 +1,114 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.amma import resilience
+from src.amma.context import Context
+from src.amma.resilience import (
+    CircuitBreaker,
+    ModelTimeoutError,
+    _hedged_call,
+    call_model,
+)
+
+
+class SlowModel:
+    """Answers each request after the next delay in ``delays``."""
+
+    def __init__(self, *delays, error=None):
+        self.delays = list(delays)
+        self.error = error
+        self.started = 0
+        self.cancelled = 0
+
+    def with_config(self, **kwargs):
+        return self
+
+    async def ainvoke(self, messages, config=None):
+        delay = self.delays[self.started]
+        self.started += 1
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error:
+            raise self.error
+        return AIMessage(content=f"answer {self.started}")
+
+
+def test_breaker_opens_at_the_threshold():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    breaker.record_failure()
+    assert not breaker.is_open and breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+
+
+def test_breaker_lets_one_probe_through_after_the_reset():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    # Only one probe per reset period
+    assert not breaker.allow()
+
+
+def test_breaker_probe_outcome_closes_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.is_open and not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()
+    assert not breaker.is_open and breaker.failures == 0 and breaker.allow()
+
+
+def test_hedge_wins_and_the_slow_request_is_cancelled():
+    model = SlowModel(1.0, 0.01)
+    response = asyncio.run(_hedged_call(model, [], "evaluator", "test-hedge", 5.0, 0.05))
+    assert response.content == "answer 2"
+    assert model.started == 2 and model.cancelled == 1
+
+
+def test_fast_answer_sends_no_hedge():
+    model = SlowModel(0.01)
+    response = asyncio.run(_hedged_call(model, [], "evaluator", "test-hedge", 5.0, 0.5))
+    assert response.content == "answer 1"
+    assert model.started == 1
+
+
+def test_timeout_cancels_every_request():
+    model = SlowModel(1.0, 1.0)
+    with pytest.raises(ModelTimeoutError):
+        asyncio.run(_hedged_call(model, [], "evaluator", "test-hedge", 0.1, 0.02))
+    assert model.started == 2 and model.cancelled == 2
+
+
+def test_error_is_raised_once_every_request_failed():
+    model = SlowModel(0.01, error=RuntimeError("provider down"))
+    with pytest.raises(RuntimeError, match="provider down"):
+        asyncio.run(_hedged_call(model, [], "evaluator", "test-hedge", 5.0, None))
+
+
+def test_timeouts_do_not_open_the_circuit(monkeypatch):
+    model = SlowModel(*[1.0] * 10)
+    monkeypatch.setattr(resilience, "load_chat_model", lambda name, **kwargs: model)
+    context = Context(model="test/slow", evaluator_timeout_seconds=0.05, hedge_percentile=0)
+    for _ in range(resilience.model_health.failure_threshold + 1):
+        with pytest.raises(resilience.ModelUnavailableError):
+            asyncio.run(call_model(context, "evaluator", []))
+    assert not resilience.model_health.breaker("test/slow").is_open
+
+
+def test_tier_timeouts_fall_back_to_the_model_timeout():
+    context = Context(model_timeout_seconds=30, creator_timeout_seconds=120)
+    assert context.timeout_seconds("creator") == 120
+    assert context.timeout_seconds("amma") == 30
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from src.amma.singleflight import SingleFlight
+
+
+class Generation:
+    """A slow call that counts how often it ran."""
+
+    def __init__(self, result="story", error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flights = SingleFlight()
+        generation = Generation()
+        leader = asyncio.ensure_future(flights.do("turtle", generation))
+        follower = asyncio.ensure_future(flights.do("turtle", generation))
+        await asyncio.sleep(0)
+        generation.release.set()
+
+        assert await leader == ("story", False)
+        assert await follower == ("story", True)
+        assert generation.calls == 1
+        assert flights.stats() == {"leaders": 1, "coalesced": 1, "in_flight": 0}
+
+    asyncio.run(scenario())
+
+
+def test_different_keys_and_later_calls_run_again():
+    async def scenario():
+        flights = SingleFlight()
+        generation = Generation()
+        generation.release.set()
+        await flights.do("turtle", generation)
+        await flights.do("owl", generation)
+        await flights.do("turtle", generation)
+        assert generation.calls == 3
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_leader_does_not_cancel_the_flight():
+    async def scenario():
+        flights = SingleFlight()
+        generation = Generation()
+        leader = asyncio.ensure_future(flights.do("turtle", generation))
+        follower = asyncio.ensure_future(flights.do("turtle", generation))
+        await asyncio.sleep(0)
+
+        # The leader's turn is dropped; the follower still gets the story
+        leader.cancel()
+        await asyncio.sleep(0)
+        generation.release.set()
+
+        assert await follower == ("story", True)
+        assert leader.cancelled()
+        assert generation.calls == 1
+
+    asyncio.run(scenario())
+
+
+def test_error_reaches_every_waiter():
+    async def scenario():
+        flights = SingleFlight()
+        generation = Generation(error=RuntimeError("model down"))
+        waiters = [asyncio.ensure_future(flights.do("turtle", generation)) for _ in range(3)]
+        await asyncio.sleep(0)
+        generation.release.set()
+
+        for waiter in waiters:
+            with pytest.raises(RuntimeError, match="model down"):
+                await waiter
+        assert generation.calls == 1
+        assert flights.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
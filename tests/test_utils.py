@@ -0,0 +1,23 @@
+from src.amma.tools import TOOLS
+from src.amma.utils import (
+    clear_model_cache,
+    load_chat_model,
+    load_tool_model,
+    model_cache_stats,
+)
+
+
+def test_plain_and_bound_lookups_share_one_instance_and_count_separately():
+    clear_model_cache()
+    model = load_chat_model("fake/instant", temperature=0.5)
+    bound = load_tool_model("fake/instant", TOOLS, temperature=0.5)
+    load_tool_model("fake/instant", TOOLS, temperature=0.5)
+
+    assert bound.bound is model
+    stats = model_cache_stats()
+    assert (stats["model_hits"], stats["model_misses"]) == (0, 1)
+    assert (stats["bound_hits"], stats["bound_misses"]) == (1, 1)
+    assert stats["cached_models"] == 1
+
+    assert load_chat_model("fake/instant", temperature=0.5) is model
+    assert model_cache_stats()["model_hits"] == 1